@@ -0,0 +1,247 @@
+"""Columnar in-memory analytics over a ledger for the chat backend (backend2.py).
+
+LedgerColumns loads a ledger's rows into NumPy arrays once (day number, month,
+paise, category code, income flag). After that, sync() only reads the rows
+added since it last looked: one indexed query per table. So it stays current
+with inserts made by any worker. If rows were updated or deleted (the
+ledger_rewrites counter of migration 6 moved), or the row counts in
+rollup_totals stop matching, it reloads.
+
+breakdown() answers a whole dashboard from those arrays with vectorized
+group-bys (np.bincount over month and category x month codes) instead of one
+SUM query per cell:
+
+    a category x month spending pivot, monthly expenses, income and net, the
+    running balance, top categories and month-over-month changes
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ledger import from_paise
+
+# Rows without a date are filed under this day, i.e. before every month, so
+# they still count towards the balance
+NO_DAY = int(np.iinfo(np.int32).min)
+UNCATEGORIZED = 'others'
+
+_DTYPES = {'day': np.int32, 'month': np.int32, 'paise': np.int64, 'category': np.int32, 'income': np.bool_}
+
+
+def month_index(year, month):
+    """Months since January 1970 (negative before)."""
+    return (year - 1970) * 12 + month - 1
+
+
+def month_label(index):
+    year, month = divmod(int(index), 12)
+    return f"{1970 + year:04d}-{month + 1:02d}"
+
+
+def _rupees(paise):
+    return [from_paise(int(p)) for p in paise]
+
+
+class LedgerColumns:
+    """One ledger's rows as NumPy columns, extended in place as rows are added."""
+
+    def __init__(self):
+        self.categories = [] # Category code -> name
+        self._codes = {}
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in _DTYPES.items()}
+        self._size = 0
+        self._last_id = {'expenses': 0, 'income': 0}
+        self._rewrites = None # ledger_rewrites count at the last sync
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.loads = 0 # Full reads of the ledger
+        self.appended = 0 # Rows picked up incrementally
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns.values())
+
+    def sync(self, conn):
+        """Reads rows added since the last sync (all of them the first time). Returns how many were added."""
+        with self._lock:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute("BEGIN") # New rows, counts and rewrites from the same snapshot
+            try:
+                first = not self._loaded
+                rewrites = conn.execute("SELECT count FROM ledger_rewrites WHERE id = 1").fetchone()[0]
+                if rewrites != self._rewrites and not first:
+                    self._reset() # Rows were updated or deleted; start over
+                    first = True
+                self._rewrites = rewrites
+                added = self._read_new(conn)
+                counts = dict(conn.execute("SELECT kind, row_count FROM rollup_totals"))
+                if sum(counts.values()) != self._size:
+                    self._reset() # Rows appeared below the last id seen; start over
+                    first = True
+                    added = self._read_new(conn)
+            finally:
+                if own_transaction:
+                    conn.commit()
+            self._loaded = True
+            if first:
+                self.loads += 1
+            else:
+                self.appended += added
+            return added
+
+    def _reset(self):
+        self.categories, self._codes = [], {}
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in _DTYPES.items()}
+        self._size = 0
+        self._last_id = {'expenses': 0, 'income': 0}
+
+    def _code(self, category):
+        code = self._codes.get(category)
+        if code is None:
+            code = self._codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _read_new(self, conn):
+        added = 0
+        for table, select in (('expenses', "category"), ('income', "NULL")):
+            rows = conn.execute(f"SELECT id, COALESCE(day, ?), COALESCE(paise, 0), {select} FROM {table} "
+                                "WHERE id > ? ORDER BY id", (NO_DAY, self._last_id[table])).fetchall()
+            if not rows:
+                continue
+            ids, days, paise, categories = zip(*rows)
+            days = np.array(days, dtype=np.int32)
+            if table == 'expenses':
+                code = self._code
+                codes = np.fromiter((code(c or UNCATEGORIZED) for c in categories), dtype=np.int32, count=len(rows))
+            else:
+                codes = np.full(len(rows), -1, dtype=np.int32)
+            self._append(
+                day=days,
+                month=days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32),
+                paise=np.array(paise, dtype=np.int64),
+                category=codes,
+                income=np.full(len(rows), table == 'income'),
+            )
+            self._last_id[table] = ids[-1]
+            added += len(rows)
+        return added
+
+    def _append(self, **values):
+        count = len(values['day'])
+        needed = self._size + count
+        if needed > len(self._columns['day']):
+            # Grow geometrically so appending a row at a time stays amortized O(1)
+            capacity = max(needed, 2 * len(self._columns['day']), 1024)
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        for name, column in self._columns.items():
+            column[self._size:needed] = values[name]
+        self._size = needed
+
+    def snapshot(self):
+        """(columns, categories) as of now; later appends don't show up in them."""
+        with self._lock:
+            return {name: column[:self._size] for name, column in self._columns.items()}, list(self.categories)
+
+    def breakdown(self, end, months=6, top=5):
+        """Summary of the `months` months up to and including `end` ((year, month)), amounts in rupees."""
+        if months < 2:
+            raise ValueError("months must be at least 2 for month-over-month changes")
+        columns, categories = self.snapshot()
+        month, paise, income, category = columns['month'], columns['paise'], columns['income'], columns['category']
+        last = month_index(*end)
+        first = last - months + 1
+
+        in_window = (month >= first) & (month <= last)
+        spent = in_window & ~income
+        earned = in_window & income
+        offset = month - first
+        expenses = self._sum_by(offset[spent], paise[spent], months)
+        earnings = self._sum_by(offset[earned], paise[earned], months)
+        net = earnings - expenses
+        before = month < first
+        opening = int(paise[before & income].sum() - paise[before & ~income].sum())
+        balance = opening + np.cumsum(net)
+
+        # Category x month grid in one bincount over combined codes
+        pivot = self._sum_by(category[spent] * months + offset[spent], paise[spent],
+                             len(categories) * months).reshape(len(categories), months)
+        totals = pivot.sum(axis=1)
+        order = [i for i in np.argsort(-totals, kind='stable') if totals[i] > 0]
+        window_spent = int(totals.sum())
+        change = pivot[:, -1] - pivot[:, -2]
+        movers = [i for i in np.argsort(-np.abs(change), kind='stable') if change[i] != 0]
+
+        return {
+            "months": [month_label(m) for m in range(first, last + 1)],
+            "expenses": _rupees(expenses),
+            "income": _rupees(earnings),
+            "net": _rupees(net),
+            "balance": _rupees(balance),
+            "pivot": {categories[i]: _rupees(pivot[i]) for i in order},
+            "top_categories": [{"category": categories[i], "total": from_paise(int(totals[i])),
+                                "share": round(int(totals[i]) / window_spent, 4)} for i in order[:top]],
+            "month_over_month": {
+                "expenses": self._change(expenses[-1], expenses[-2]),
+                "income": self._change(earnings[-1], earnings[-2]),
+                "categories": [{"category": categories[i], **self._change(pivot[i, -1], pivot[i, -2])}
+                               for i in movers[:top]],
+            },
+        }
+
+    @staticmethod
+    def _sum_by(keys, paise, length):
+        # bincount sums in float64, exact for totals below 2**53 paise
+        return np.rint(np.bincount(keys, weights=paise, minlength=length)).astype(np.int64)
+
+    @staticmethod
+    def _change(current, previous):
+        current, previous = int(current), int(previous)
+        return {
+            "current": from_paise(current),
+            "previous": from_paise(previous),
+            "change": from_paise(current - previous),
+            "percent": round((current - previous) / previous * 100, 1) if previous else None,
+        }
+
+
+class LedgerAnalytics:
+    """A bounded LRU of LedgerColumns, one per ledger (None is the shared database)."""
+
+    def __init__(self, max_open=64):
+        self.max_open = max_open
+        self._ledgers = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def columns(self, scope, conn):
+        """The ledger's columns, synced with conn (which must be that ledger's database)."""
+        with self._lock:
+            ledger = self._ledgers.get(scope)
+            if ledger is None:
+                ledger = self._ledgers[scope] = LedgerColumns()
+                while len(self._ledgers) > self.max_open:
+                    self._ledgers.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._ledgers.move_to_end(scope)
+        ledger.sync(conn)
+        return ledger
+
+    def stats(self):
+        with self._lock:
+            ledgers = list(self._ledgers.values())
+            evicted = self.evicted
+        return {"open": len(ledgers), "max_open": self.max_open, "evicted": evicted,
+                "rows": sum(len(ledger) for ledger in ledgers),
+                "bytes": sum(ledger.nbytes for ledger in ledgers),
+                "loads": sum(ledger.loads for ledger in ledgers),
+                "appended": sum(ledger.appended for ledger in ledgers)}
@@ -0,0 +1,163 @@
+"""Async (ASGI) serving mode for the chat backend.
+
+Serves the same POST /chat contract as backend2.py (plus GET /stats) from an
+event loop instead of one blocked thread per request. The loop only reads and
+writes HTTP: message analysis (parsing, intent classification and the
+category/date extraction, handed on to the classifier worker processes when
+backend2 has them) runs in a bounded "classify" thread pool, and the intent
+handlers (their SQLite work, on the request's pooled connection) in a separate
+"handler" pool, so slow database calls never hold up classification or the loop.
+
+Model reloads have no route here; activate a version with registry.py and the
+registry watcher in backend2 swaps it in.
+
+Run from the backend folder:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import g
+
+import backend2
+from backend2 import app as flask_app, analyze_message, parse_user_id, respond_to_intent, special_response
+
+# Threads classifying messages. sklearn/numpy release the GIL for part of the
+# work; beyond the core count extra threads only add contention.
+CPU_WORKERS = int(os.environ.get("FUNDMATE_ASGI_CPU_WORKERS", str(os.cpu_count() or 1)))
+# Threads running intent handlers. Each holds one pooled connection while it
+# runs, so more threads than connections would just queue on the pool.
+IO_WORKERS = int(os.environ.get("FUNDMATE_ASGI_IO_WORKERS", str(backend2.DB_POOL_SIZE)))
+MAX_BODY_BYTES = 1024 * 1024
+
+cpu_executor = ThreadPoolExecutor(CPU_WORKERS, thread_name_prefix="classify")
+io_executor = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="handler")
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+]
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def handle(intent, message, user_id):
+    """Runs the intent handler inside an app context so get_db() works as in Flask."""
+    with flask_app.app_context():
+        if user_id is not None:
+            g.user_id = user_id
+        # Leaving the context runs release_db, returning the connection to its pool
+        return respond_to_intent(intent, message)
+
+
+async def chat(body):
+    """Returns (status, payload) for a /chat request body."""
+    try:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return 400, {"error": "Expected a JSON body."}
+        if not isinstance(data, dict):
+            return 400, {"error": "Expected a JSON body."}
+        user_input = data.get("message")
+        print(f"Received message: {user_input}")
+        try:
+            user_id = parse_user_id(data.get("user_id"))
+        except ValueError:
+            return 400, {"error": "Invalid user_id."}
+
+        if not isinstance(user_input, str) or not user_input.strip():
+            print("Received empty or whitespace-only message.")
+            return 400, {"response": "Received empty message. How can I help?"}
+
+        special = special_response(user_input)
+        if special:
+            return 200, special
+
+        active = backend2.serving # Kept for the whole request across a model reload
+        loop = asyncio.get_running_loop()
+        # Parsed once, read by both stages; rules first, then the model, as in the Flask /chat route
+        message, intent = await loop.run_in_executor(cpu_executor, analyze_message, user_input, active)
+        response_text = await loop.run_in_executor(io_executor, handle, intent, message, user_id)
+        print(f"Sending standard response: {response_text}")
+        return 200, {"response": response_text, "model_version": active.version}
+
+    except Exception as e:
+        print(f"Error in /chat endpoint: {e}")
+        traceback.print_exc()
+        return 500, {"error": "An internal server error occurred. Please try again."}
+
+
+def stats():
+    return 200, backend2.collect_stats()
+
+
+async def read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers + CORS_HEADERS})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            cpu_executor.shutdown(wait=True)
+            io_executor.shutdown(wait=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    path, method = scope["path"], scope["method"]
+
+    if method == "OPTIONS":
+        # CORS preflight, as flask_cors answers it for the Flask app
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS + [
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-allow-headers", b"content-type"),
+        ]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if path == "/chat" and method == "POST":
+        try:
+            status, payload = await chat(await read_body(receive))
+        except BodyTooLarge:
+            status, payload = 413, {"error": "Request body too large."}
+    elif path == "/stats" and method == "GET":
+        status, payload = stats()
+    elif path in ("/chat", "/stats"):
+        status, payload = 405, {"error": "Method not allowed."}
+    else:
+        status, payload = 404, {"error": "Not found."}
+    await send_json(send, status, payload)
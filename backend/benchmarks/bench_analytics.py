@@ -0,0 +1,176 @@
+"""Benchmark: a 12-month spending breakdown from NumPy columns vs. from SQL.
+
+Fills a temporary database with `rows` expenses plus a tenth as many income
+rows over five years. Then it builds the same breakdown (category x month
+pivot, monthly expenses/income, opening balance) for the last 12 months three
+ways:
+  - per-cell SQL: one SUM query per category x month cell and per monthly
+    total, as a dashboard built on the scalar handlers would
+  - grouped SQL: three GROUP BY queries
+  - analytics.py: columns loaded once, then synced and summarized per request;
+    timed cold (first load), warm (no new rows), after each new expense and
+    after an expense is re-categorized (which reloads them)
+All three must agree to the paisa.
+
+Run from the repo root:  python backend/benchmarks/bench_analytics.py [rows] [repeat]
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analytics import LedgerColumns, month_index, month_label
+from ledger import EXPENSE_INSERT, INCOME_INSERT, day_number, expense_row, income_row
+from migrations import migrate
+
+CATEGORIES = ['food', 'transport', 'groceries', 'stationery', 'outing', 'heart', 'others']
+END = (2025, 12)
+MONTHS = 12
+
+
+def fill(path, rows):
+    conn = sqlite3.connect(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn)
+    rng = random.Random(0)
+    first = date(2021, 1, 1)
+
+    def ledger(n, expense):
+        for _ in range(n):
+            day = first + timedelta(days=rng.randrange(5 * 365))
+            amount = rng.randrange(500, 500000) / 100
+            yield expense_row(day, rng.choice(CATEGORIES), amount) if expense else income_row(day, amount)
+
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany(EXPENSE_INSERT, ledger(rows, True))
+    conn.executemany(INCOME_INSERT, ledger(rows // 10, False))
+    conn.commit()
+    return conn
+
+
+def month_days(index):
+    """(first day number, last day number) of a month index."""
+    year, month = divmod(index, 12)
+    start = date(1970 + year, month + 1, 1)
+    following = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return day_number(start), day_number(following) - 1
+
+
+def window():
+    last = month_index(*END)
+    return [month_days(m) for m in range(last - MONTHS + 1, last + 1)]
+
+
+def per_cell_sql(conn):
+    """One scalar SUM per cell."""
+    ranges = window()
+    one = lambda sql, *params: conn.execute(sql, params).fetchone()[0] or 0
+    pivot = {c: [one("SELECT SUM(paise) FROM expenses WHERE category = ? AND day BETWEEN ? AND ?", c, *r)
+                 for r in ranges] for c in CATEGORIES}
+    expenses = [one("SELECT SUM(paise) FROM expenses WHERE day BETWEEN ? AND ?", *r) for r in ranges]
+    income = [one("SELECT SUM(paise) FROM income WHERE day BETWEEN ? AND ?", *r) for r in ranges]
+    start = ranges[0][0]
+    opening = one("SELECT SUM(paise) FROM income WHERE day < ?", start) - \
+        one("SELECT SUM(paise) FROM expenses WHERE day < ?", start)
+    return pivot, expenses, income, opening
+
+
+def grouped_sql(conn):
+    """Three GROUP BY queries over the window."""
+    ranges = window()
+    start, end = ranges[0][0], ranges[-1][1]
+    labels = [month_label(m) for m in range(month_index(*END) - MONTHS + 1, month_index(*END) + 1)]
+    pivot = {c: [0] * MONTHS for c in CATEGORIES}
+    for category, month, total in conn.execute(
+            "SELECT category, substr(date, 1, 7), SUM(paise) FROM expenses WHERE day BETWEEN ? AND ? "
+            "GROUP BY 1, 2", (start, end)):
+        pivot[category][labels.index(month)] = total
+    expenses = [sum(pivot[c][i] for c in CATEGORIES) for i in range(MONTHS)]
+    income = [0] * MONTHS
+    for month, total in conn.execute("SELECT substr(date, 1, 7), SUM(paise) FROM income WHERE day BETWEEN ? AND ? "
+                                     "GROUP BY 1", (start, end)):
+        income[labels.index(month)] = total
+    opening = conn.execute("SELECT (SELECT COALESCE(SUM(paise), 0) FROM income WHERE day < ?) - "
+                           "(SELECT COALESCE(SUM(paise), 0) FROM expenses WHERE day < ?)", (start, start)).fetchone()[0]
+    return pivot, expenses, income, opening
+
+
+def columnar(columns, conn):
+    columns.sync(conn)
+    summary = columns.breakdown(END, MONTHS)
+    paise = lambda values: [round(v * 100) for v in values]
+    pivot = {c: paise(summary["pivot"].get(c, [0] * MONTHS)) for c in CATEGORIES}
+    expenses, income = paise(summary["expenses"]), paise(summary["income"])
+    opening = round(summary["balance"][0] * 100) - (income[0] - expenses[0])
+    return pivot, expenses, income, opening
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        conn = fill(os.path.join(tmp, 'ledger.db'), rows)
+        print(f"Filled {rows:,} expenses + {rows // 10:,} income rows in {time.perf_counter() - started:.1f}s; "
+              f"breakdown of {MONTHS} months x {len(CATEGORIES)} categories")
+
+        cells, expected = best(lambda: per_cell_sql(conn), repeat)
+        grouped, grouped_result = best(lambda: grouped_sql(conn), repeat)
+        columns = LedgerColumns()
+        started = time.perf_counter()
+        cold_result = columnar(columns, conn)
+        cold = time.perf_counter() - started
+        warm, warm_result = best(lambda: columnar(columns, conn), repeat)
+
+        rng = random.Random(1)
+        after_write = []
+        for _ in range(repeat):
+            conn.execute(EXPENSE_INSERT, expense_row(date(2025, 12, rng.randrange(1, 29)), rng.choice(CATEGORIES),
+                                                     rng.randrange(500, 50000) / 100))
+            conn.commit()
+            started = time.perf_counter()
+            write_result = columnar(columns, conn)
+            after_write.append(time.perf_counter() - started)
+        per_cell_after = per_cell_sql(conn)
+
+        conn.execute("UPDATE expenses SET category = ? WHERE id = (SELECT MAX(id) FROM expenses)",
+                     (CATEGORIES[0],))
+        conn.commit()
+        started = time.perf_counter()
+        update_result = columnar(columns, conn)
+        after_update = time.perf_counter() - started
+        per_cell_update = per_cell_sql(conn)
+
+        statements = MONTHS * len(CATEGORIES) + 2 * MONTHS + 2
+        print(f"{'method':<26} {'time':>10} {'SQL statements':>15}")
+        print(f"{'per-cell SQL':<26} {cells * 1000:>8.1f}ms {statements:>15}")
+        print(f"{'grouped SQL':<26} {grouped * 1000:>8.1f}ms {3:>15}")
+        print(f"{'columns, cold load':<26} {cold * 1000:>8.1f}ms {4:>15}")
+        print(f"{'columns, warm':<26} {warm * 1000:>8.1f}ms {4:>15}")
+        print(f"{'columns, after a write':<26} {min(after_write) * 1000:>8.1f}ms {4:>15}")
+        print(f"{'columns, after an update':<26} {after_update * 1000:>8.1f}ms {4:>15}")
+        print(f"Columns hold {len(columns):,} rows in {columns.nbytes / 1e6:.1f}MB")
+        agree = expected == grouped_result == cold_result == warm_result and write_result == per_cell_after \
+            and update_result == per_cell_update
+        print(f"All methods agree: {agree}")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
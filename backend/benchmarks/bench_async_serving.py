@@ -0,0 +1,115 @@
+"""Load test: Flask (threaded, as app.run serves it) vs. the ASGI mode under uvicorn.
+
+Starts each server as a subprocess on a local port, then has `clients`
+concurrent keep-alive clients POST read-only /chat messages (greetings,
+balance and summary lookups, so the database isn't modified) for a fixed
+time. Reports requests/s and p50/p99 latency. The clients share the machine
+with the server, so absolute numbers are pessimistic; compare the two modes.
+Needs uvicorn for the ASGI run.
+
+Run from the repo root:  python backend/benchmarks/bench_async_serving.py [clients] [seconds]
+"""
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MESSAGES = [
+    'hi',
+    'show my balance',
+    'summary for april',
+    'show expenses for food',
+    'show summary on 2025-04-30',
+    'what can you do',
+]
+SERVERS = {
+    'flask': [sys.executable, '-c',
+              'import sys, backend2; backend2.app.run(host="127.0.0.1", port=int(sys.argv[1]), threaded=True)'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--log-level', 'warning', '--port'],
+}
+
+
+def start_server(mode, port):
+    proc = subprocess.Popen(SERVERS[mode] + [str(port)], cwd=BACKEND_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120 # Model loading dominates startup
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('POST', '/chat', body=json.dumps({'message': 'hi'}),
+                         headers={'Content-Type': 'application/json'})
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not come up")
+
+
+def load(port, clients, seconds):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        failed = 0
+        i = offset
+        while time.monotonic() < stop:
+            body = json.dumps({'message': MESSAGES[i % len(MESSAGES)]})
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/chat', body=body, headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except OSError:
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    return len(latencies) / seconds, pick(0.5), pick(0.99), sum(errors)
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{clients} concurrent clients, {seconds:.0f}s per server")
+    print(f"{'mode':<6} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+    for port, mode in enumerate(SERVERS, start=5801):
+        proc = start_server(mode, port)
+        try:
+            rate, p50, p99, errors = load(port, clients, seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{mode:<6} {rate:>8.0f} {p50:>7.1f}ms {p99:>7.1f}ms {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
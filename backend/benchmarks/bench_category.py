@@ -0,0 +1,60 @@
+"""Benchmark: single-pass category matcher vs. the old one-regex-per-keyword loop.
+
+Run from the repo root:  python backend/benchmarks/bench_category.py
+"""
+import csv
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extractors import CATEGORY_KEYWORDS, build_keyword_index, match_category
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'chatbot', 'dataset',
+                       'fundsmanager_augmented_1050_with_heart(1).csv')
+
+
+def legacy_extract_category(text, keyword_map=CATEGORY_KEYWORDS):
+    """The pre-index implementation, kept here for parity and timing."""
+    text = text.lower()
+    for category, keywords in keyword_map.items():
+        for keyword in keywords:
+            if keyword and re.search(r'\b' + re.escape(keyword) + r'\b', text):
+                return category
+    return 'others'
+
+
+def load_messages():
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        return [row['text'] for row in csv.DictReader(f) if row.get('text')]
+
+
+def inflated_keyword_map(extra):
+    """Original map plus `extra` made-up keywords that never match."""
+    keyword_map = {cat: list(kws) for cat, kws in CATEGORY_KEYWORDS.items()}
+    keyword_map['others'] = [f'zzkw{i}' for i in range(extra)]
+    return keyword_map
+
+
+def main():
+    messages = load_messages()
+
+    mismatches = [m for m in messages if legacy_extract_category(m) != match_category(m)[0]]
+    print(f"Parity on {len(messages)} dataset messages: {len(mismatches)} mismatches")
+    for m in mismatches[:10]:
+        print(f"  {m!r}: legacy={legacy_extract_category(m)} new={match_category(m)[0]}")
+
+    print(f"\n{'keywords':>9} {'legacy us/msg':>14} {'index us/msg':>13}")
+    # The legacy loop gets slow fast, so it only sees a sample of the messages
+    sample = messages[:100]
+    for extra in (0, 400, 2000):
+        keyword_map = inflated_keyword_map(extra)
+        index = build_keyword_index(keyword_map)
+        legacy = timeit.timeit(lambda: [legacy_extract_category(m, keyword_map) for m in sample], number=1)
+        new = timeit.timeit(lambda: [match_category(m, index) for m in messages], number=5)
+        print(f"{len(index):>9} {legacy / len(sample) * 1e6:>14.2f} {new / (5 * len(messages)) * 1e6:>13.2f}")
+
+if __name__ == '__main__':
+    main()
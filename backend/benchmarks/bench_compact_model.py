@@ -0,0 +1,96 @@
+"""Parity check and startup/RSS comparison: pickled sklearn pipeline vs. compact .npz scorer.
+
+Run from the repo root:  python backend/benchmarks/bench_compact_model.py
+"""
+import csv
+import os
+import subprocess
+import sys
+import warnings
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BACKEND)
+
+import numpy as np
+
+from compact_model import load_compact_model
+
+ROOT = os.path.join(BACKEND, '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+MODEL_DIR = os.path.join(ROOT, 'chatbot', 'vectorized_set')
+PICKLED_MODEL = os.path.join(MODEL_DIR, 'intent_model_v3.pkl')
+PICKLED_VECTORIZER = os.path.join(MODEL_DIR, 'tfidf_vectorizer_v3.pkl')
+COMPACT_MODEL = os.path.join(MODEL_DIR, 'intent_model_v3.npz')
+
+RSS_KB = """
+def rss_kb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+"""
+
+# Each snippet loads one format, classifies one message and prints "seconds rss_kb".
+# RSS comes from /proc (Linux) since ru_maxrss survives exec and would report the parent's peak.
+LOAD_PICKLE = f"""
+import time, warnings
+{RSS_KB}warnings.filterwarnings('ignore')
+start = time.perf_counter()
+import joblib
+model = joblib.load({PICKLED_MODEL!r})
+vectorizer = joblib.load({PICKLED_VECTORIZER!r})
+model.predict(vectorizer.transform(['show my balance']))
+print(time.perf_counter() - start, rss_kb())
+"""
+LOAD_COMPACT = f"""
+import sys, time
+{RSS_KB}start = time.perf_counter()
+sys.path.insert(0, {BACKEND!r})
+from compact_model import load_compact_model
+vectorizer, model = load_compact_model({COMPACT_MODEL!r})
+model.predict(vectorizer.transform(['show my balance']))
+print(time.perf_counter() - start, rss_kb())
+"""
+
+
+def check_parity(messages):
+    import joblib
+    warnings.filterwarnings('ignore')
+    model = joblib.load(PICKLED_MODEL)
+    vectorizer = joblib.load(PICKLED_VECTORIZER)
+    compact_vectorizer, compact_model = load_compact_model(COMPACT_MODEL)
+
+    expected = model.predict(vectorizer.transform(messages))
+    got = compact_model.predict(compact_vectorizer.transform(messages))
+    mismatches = [(m, e, g) for m, e, g in zip(messages, expected, got) if e != g]
+    max_diff = np.abs(model.decision_function(vectorizer.transform(messages))
+                      - compact_model.decision_function(compact_vectorizer.transform(messages))).max()
+    print(f"Parity on {len(messages)} messages: {len(mismatches)} mismatches, max score diff {max_diff:.2e}")
+    for m, e, g in mismatches[:10]:
+        print(f"  {m!r}: sklearn={e} compact={g}")
+    return not mismatches
+
+
+def measure(snippet, runs=5):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True, check=True)
+        seconds, rss = out.stdout.split()
+        samples.append((float(seconds), int(rss)))
+    return min(s for s, _ in samples), min(r for _, r in samples)
+
+
+def main():
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        messages = [row['text'] for row in csv.DictReader(f) if row.get('text')]
+    # A few inputs outside the training set, including an empty one and odd unicode
+    messages += ['', '!!!', 'Spent ₹500 on café', 'ÉXPENSES for FOOD', 'show my balance please 2025-04-10']
+    ok = check_parity(messages)
+
+    print(f"\n{'format':<8} {'load+first predict':>19} {'RSS':>10}")
+    for name, snippet in (('pickle', LOAD_PICKLE), ('compact', LOAD_COMPACT)):
+        seconds, rss = measure(snippet)
+        print(f"{name:<8} {seconds * 1000:>16.0f}ms {rss / 1024:>8.1f}MB")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
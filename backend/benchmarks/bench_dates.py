@@ -0,0 +1,110 @@
+"""Benchmark and check: fast-path date extraction vs. the dateutil-only extract_date.
+
+Checks match_date against hand-written phrases with known answers, compares the
+fast path with the old dateutil-based result on every dataset message and
+prints where they differ, then times both over the dataset.
+
+Run from the repo root:  python backend/benchmarks/bench_dates.py
+"""
+import csv
+import os
+import re
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dateutil.parser import parse
+
+from dates import match_date, needs_fallback, strip_amount
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+ISO_DATE = re.compile(r'\b(\d{4})[-/](\d{1,2})[-/](\d{1,2})\b')
+
+TODAY = date(2025, 4, 30) # A Wednesday
+CASES = [
+    ('spent 200 on pizza today', date(2025, 4, 30)),
+    ('paid 50 for bus yesterday', date(2025, 4, 29)),
+    ('lunch 80 day before yesterday', date(2025, 4, 28)),
+    ('add 715 for fees on 14 december', date(2025, 12, 14)),
+    ('record 815 spent on entertainment dated 06 november', date(2025, 11, 6)),
+    ('income of 1095 from scholarship on 12th march', date(2025, 3, 12)),
+    ('spent 30 on the 3rd of feb', date(2025, 2, 3)),
+    ('got 500 on april 15th, 2024', date(2024, 4, 15)),
+    ('spent 40 on 15 apr 2024', date(2024, 4, 15)),
+    ('spent 99 on 15/04', date(2025, 4, 15)),
+    ('spent 99 on 5-1-24', date(2024, 1, 5)),
+    ('spent 60 last monday', date(2025, 4, 28)),
+    ('spent 60 last wednesday', date(2025, 4, 23)),
+    ('spent 60 on wednesday', date(2025, 4, 30)),
+    ('spent 12.50 on tea', None), # An amount, not a date
+    ('add 50 march', None), # 50 isn't a day
+    ('show my balance', None),
+]
+
+
+def legacy_extract_date(text):
+    """extract_date as it was before the fast path (dateutil for anything non-ISO), minus logging."""
+    match = ISO_DATE.search(text)
+    try:
+        if match:
+            parsed_date = datetime(*map(int, match.groups()))
+        elif text.strip():
+            parsed_date = parse(text, fuzzy=True, default=datetime.now(), dayfirst=True)
+        else:
+            parsed_date = datetime.now()
+    except (ValueError, OverflowError, TypeError):
+        parsed_date = datetime.now()
+    return parsed_date.strftime('%Y-%m-%d')
+
+
+def fast_extract_date(text):
+    """extract_date's order after this change: ISO regex, fast path, dateutil only if still needed."""
+    if ISO_DATE.search(text):
+        return legacy_extract_date(text)
+    lowered = text.lower()
+    found = match_date(lowered)
+    if found is not None:
+        return found.strftime('%Y-%m-%d')
+    if not needs_fallback(lowered):
+        return datetime.now().strftime('%Y-%m-%d')
+    return legacy_extract_date(strip_amount(text))
+
+
+def main():
+    failures = [(text, expected, match_date(text, TODAY)) for text, expected in CASES
+                if match_date(text, TODAY) != expected]
+    print(f"Phrase checks: {len(CASES) - len(failures)}/{len(CASES)} correct")
+    for text, expected, got in failures:
+        print(f"  {text!r}: expected {expected}, got {got}")
+
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        messages = [row['text'] for row in csv.DictReader(f) if row.get('text')]
+    matched = sum(match_date(m.lower()) is not None for m in messages)
+    fallback = sum(match_date(m.lower()) is None and needs_fallback(m.lower()) for m in messages)
+    differ = [(m, legacy_extract_date(m), fast_extract_date(m)) for m in messages
+              if legacy_extract_date(m) != fast_extract_date(m)]
+    # dateutil reads the amount in "add 2150 ... on 19 April" as the year
+    same_day = sum(old[-5:] == new[-5:] for _, old, new in differ)
+    print(f"Dataset: {len(messages)} messages, {matched} matched by the fast path, "
+          f"{fallback} still need dateutil")
+    print(f"  {len(differ)} differ from dateutil ({same_day} of them only in the year)")
+    for text, old, new in differ[:15]:
+        print(f"  {text!r}: dateutil {old}, fast path {new}")
+
+    with_dates = [m for m in messages if match_date(m.lower()) is not None]
+    print(f"{'messages':<12} {'extractor':<10} {'per message':>12}")
+    for label, sample in (('all', messages), ('with dates', with_dates)):
+        for name, extract in (('dateutil', legacy_extract_date), ('fast path', fast_extract_date)):
+            start = time.perf_counter()
+            for _ in range(5):
+                for text in sample:
+                    extract(text)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<12} {name:<10} {elapsed / (5 * len(sample)) * 1e6:>10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Load test: one shared connection (the old setup) vs. the WAL connection pool.
+
+Reader threads run the summary handlers' queries while writer threads insert
+and commit expenses, both for a fixed time.
+
+Run from the repo root:  python backend/benchmarks/bench_db_concurrency.py [readers] [writers]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import ConnectionPool
+from ledger import EXPENSE_INSERT, day_number, expense_row
+from migrations import migrate
+
+DURATION = 3.0
+READS = [
+    ("SELECT COALESCE((SELECT total FROM rollup_totals WHERE kind = 'expense'), 0)", ()),
+    ("SELECT COALESCE((SELECT total FROM rollup_month WHERE kind = 'expense' AND month = ? AND year = ?), 0)", (4, 2025)),
+    ("SELECT COALESCE(SUM(paise), 0) FROM expenses WHERE day = ?", (day_number('2025-04-30'),)),
+]
+WRITE = (EXPENSE_INSERT, expense_row('2025-04-30', 'food', 12.5))
+
+
+class SharedConnection:
+    """The old setup: every thread uses one connection opened with check_same_thread=False."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    def acquire(self):
+        return self.conn
+
+    def release(self, conn):
+        pass
+
+
+def seed(path, rows=200_000):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.executemany(EXPENSE_INSERT, (expense_row('2025-04-%02d' % (i % 28 + 1), ('food', 'heart', 'fees')[i % 3], 10.0)
+                                      for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def load(source, readers, writers):
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + DURATION
+
+    def reader():
+        n = 0
+        while time.monotonic() < stop:
+            conn = source.acquire()
+            try:
+                for sql, params in READS:
+                    conn.execute(sql, params).fetchone()
+                n += 1
+            except sqlite3.Error:
+                with lock:
+                    counts['errors'] += 1
+            finally:
+                source.release(conn)
+        with lock:
+            counts['reads'] += n
+
+    def writer():
+        n = 0
+        while time.monotonic() < stop:
+            conn = source.acquire()
+            try:
+                conn.execute(*WRITE)
+                conn.commit()
+                n += 1
+            except sqlite3.Error:
+                with lock:
+                    counts['errors'] += 1
+            finally:
+                source.release(conn)
+        with lock:
+            counts['writes'] += n
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    print(f"{readers} readers + {writers} writers for {DURATION:.0f}s each")
+    print(f"{'mode':<18} {'reads/s':>9} {'writes/s':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('shared connection', 'WAL pool'):
+            path = os.path.join(tmp, mode.replace(' ', '_') + '.db')
+            seed(path)
+            if mode == 'WAL pool':
+                source = ConnectionPool(path, size=readers + writers)
+            else:
+                source = SharedConnection(path)
+            counts = load(source, readers, writers)
+            print(f"{mode:<18} {counts['reads'] / DURATION:>9.0f} {counts['writes'] / DURATION:>9.0f} {counts['errors']:>7}")
+            if mode == 'WAL pool':
+                source.close()
+            else:
+                source.conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: per-row commit vs. GroupCommitWriter for concurrent expense inserts.
+
+Both modes are durable (synchronous=FULL): per-row commit pays one fsync per
+insert, group commit one per group. Uses a temporary database on the same disk
+as the system temp dir; results depend heavily on the disk's fsync latency.
+
+Run from the repo root:  python backend/benchmarks/bench_group_commit.py [threads] [max_delay_ms]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import ConnectionPool, GroupCommitWriter
+from ledger import EXPENSE_INSERT, expense_row
+from migrations import migrate
+
+DURATION = 3.0
+ROW = expense_row('2025-04-30', 'food', 12.5)
+
+
+def run(write, threads):
+    counts = []
+    latencies = []
+    lock = threading.Lock()
+    stop = time.monotonic() + DURATION
+
+    def worker():
+        n = 0
+        local = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            write()
+            local.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            counts.append(n)
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    latencies.sort()
+    return sum(counts) / DURATION, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    max_delay_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        conn.close()
+        pool = ConnectionPool(path, size=threads, pragmas={**ConnectionPool(path).pragmas, 'synchronous': 'FULL'})
+
+        def per_row_commit():
+            conn = pool.acquire()
+            try:
+                conn.execute(EXPENSE_INSERT, ROW)
+                conn.commit()
+            finally:
+                pool.release(conn)
+
+        writer = GroupCommitWriter(pool, max_batch=64, max_delay=max_delay_ms / 1000)
+
+        def group_commit():
+            writer.execute(EXPENSE_INSERT, ROW)
+
+        print(f"{threads} writer threads, {DURATION:.0f}s each, group max delay {max_delay_ms}ms")
+        print(f"{'mode':<15} {'writes/s':>9} {'p99':>9}")
+        for name, write in (('per-row commit', per_row_commit), ('group commit', group_commit)):
+            rate, p99 = run(write, threads)
+            print(f"{name:<15} {rate:>9.0f} {p99:>7.1f}ms")
+        writer.close()
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: classifying under load while the model is hot-reloaded.
+
+Publishes the repo's model as two registry versions in a temp directory, then
+runs client threads that classify dataset messages the way /chat does (capture
+the serving model, rules, then predict_intent) for a few seconds twice: once
+with no reloads, once while the main thread swaps v1 <-> v2 every `interval`
+ms through load_model(). Reports throughput, latency percentiles, failed
+classifications and which versions answered, plus how long each reload took
+(roughly the downtime a restart would cost instead). The app starts on an
+empty ledger in another temp directory, and the intent cache is off so every
+message reaches the model.
+
+Run from the repo root:  python backend/benchmarks/bench_hot_reload.py [threads] [interval_ms]
+"""
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from registry import ModelRegistry
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+ARTIFACTS = os.path.join(ROOT, 'chatbot', 'vectorized_set')
+DURATION = 3.0
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(backend2, texts, threads, interval):
+    from features import MessageFeatures
+    latencies, versions, failures = [], Counter(), [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + DURATION
+
+    def client(offset):
+        mine, seen, failed = [], Counter(), 0
+        i = offset
+        while time.monotonic() < stop:
+            message = MessageFeatures(texts[i % len(texts)])
+            started = time.perf_counter()
+            active = backend2.serving
+            intent = backend2.rule_based_intent(message) or backend2.predict_intent(message, active)
+            mine.append(time.perf_counter() - started)
+            seen[active.version] += 1
+            failed += intent == "unknown"
+            i += threads
+        with lock:
+            latencies.extend(mine)
+            versions.update(seen)
+            failures[0] += failed
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    reloads = []
+    if interval:
+        version = 'v1'
+        while time.monotonic() < stop:
+            time.sleep(interval)
+            version = 'v2' if version == 'v1' else 'v1'
+            started = time.perf_counter()
+            backend2.load_model(version)
+            reloads.append(time.perf_counter() - started)
+    for w in workers:
+        w.join()
+    latencies.sort()
+    return len(latencies) / DURATION, latencies, failures[0], versions, reloads
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    interval = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.1
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        texts = [row['text'] for row in csv.DictReader(f) if row.get('text')]
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as data:
+        registry = ModelRegistry(tmp)
+        files = {'model.pkl': os.path.join(ARTIFACTS, 'intent_model_v3.pkl'),
+                 'vectorizer.pkl': os.path.join(ARTIFACTS, 'tfidf_vectorizer_v3.pkl'),
+                 'model.npz': os.path.join(ARTIFACTS, 'intent_model_v3.npz')}
+        registry.activate(registry.publish(files))
+        registry.publish(files)
+        os.environ.update(FUNDMATE_MODEL_REGISTRY_DIR=tmp, FUNDMATE_MODEL_WATCH_S='0', FUNDMATE_INTENT_CACHE_SIZE='0',
+                          FUNDMATE_DB_PATH=os.path.join(data, 'ledger.db'), FUNDMATE_INSIGHTS_INTERVAL_S='0')
+        # backend2 logs every message; keep the output to the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            import backend2
+            results = [('steady', run(backend2, texts, threads, 0)),
+                       (f'reload/{interval * 1000:.0f}ms', run(backend2, texts, threads, interval))]
+
+    print(f"{threads} client threads, {DURATION:.0f}s per run, {backend2.MODEL_FORMAT} format")
+    print(f"{'run':<14} {'msg/s':>8} {'p50':>8} {'p99':>8} {'max':>8} {'failed':>7}  versions")
+    for name, (rate, latencies, failed, versions, reloads) in results:
+        print(f"{name:<14} {rate:>8.0f} {percentile(latencies, 0.5) * 1000:>6.2f}ms "
+              f"{percentile(latencies, 0.99) * 1000:>6.2f}ms {latencies[-1] * 1000:>6.1f}ms {failed:>7}  "
+              + ', '.join(f"{v}={n}" for v, n in sorted(versions.items())))
+        if reloads:
+            print(f"{'':<14} {len(reloads)} reloads, {sum(reloads) / len(reloads) * 1000:.1f}ms average, "
+                  f"{max(reloads) * 1000:.1f}ms max")
+
+
+if __name__ == '__main__':
+    main()
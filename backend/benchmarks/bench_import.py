@@ -0,0 +1,73 @@
+"""Benchmark: streaming CSV import of a large bank statement.
+
+Writes a synthetic statement (no category column, so categories are matched
+from the narration), imports it into a fresh database and reports rows/s and
+how much the process's anonymous memory grew (Linux: RssAnon, sampled at
+each progress report; file-backed pages from SQLite's mmap are left out).
+
+Run from the repo root:  python backend/benchmarks/bench_import.py [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import ConnectionPool
+from importer import ColumnMapping, import_csv, print_progress
+from migrations import migrate
+from rollups import check_rollups
+
+NARRATIONS = ['UPI pizza order', 'Uber ride', 'college fees', 'netflix subscription', 'grocery store',
+              'movie tickets', 'ATM withdrawal', 'notebook and pens', 'gift for girlfriend', 'jeans']
+
+
+def anon_rss_mb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('RssAnon:')) / 1024
+
+
+def write_statement(path, rows):
+    rng = random.Random(0)
+    start = date(2020, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Date,Narration,Withdrawal,Deposit\n')
+        for _ in range(rows):
+            day = (start + timedelta(days=rng.randrange(2000))).strftime('%d/%m/%Y')
+            if rng.random() < 0.1:
+                f.write(f'{day},Salary credit,,"{rng.randrange(1000, 90000):,}.00"\n')
+            else:
+                f.write(f'{day},{rng.choice(NARRATIONS)},{rng.uniform(10, 5000):.2f},\n')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'statement.csv')
+        write_statement(csv_path, rows)
+        print(f"Statement: {rows:,} rows, {os.path.getsize(csv_path) / 2**20:.0f}MB")
+
+        # Same tuned connection the CLI and the /import endpoint use
+        conn = ConnectionPool(os.path.join(tmp, 'bench.db')).connect()
+        migrate(conn)
+        mapping = ColumnMapping(date='Date', debit='Withdrawal', credit='Deposit', description='Narration')
+        rss_before = anon_rss_mb()
+        samples = []
+
+        def progress(stats):
+            samples.append(anon_rss_mb())
+            print_progress(stats)
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            stats = import_csv(conn, f, mapping, progress=progress, progress_every=100_000)
+        print(f"Imported {stats['expenses']:,} expenses + {stats['income']:,} income in {stats['seconds']:.1f}s "
+              f"= {stats['rows_per_second']:,} rows/s ({stats['skipped']} skipped)")
+        print(f"Anonymous RSS: {rss_before:.1f}MB before, at most {max(samples):.1f}MB during the import")
+        print(f"Rollup drift after import: {len(check_rollups(conn))} entries")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: summary handler queries on a large ledger, before and after the index migration.
+
+Seeds a temporary database with synthetic rows, times the SQL each handler runs,
+applies the index migration (version 2) and times them again.
+
+Run from the repo root:  python backend/benchmarks/bench_indexes.py [rows_per_table]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from extractors import CATEGORY_KEYWORDS
+from migrations import migrate
+
+CATEGORIES = list(CATEGORY_KEYWORDS)
+
+# The queries each handler in backend2.py runs, with typical parameters
+HANDLER_QUERIES = {
+    'show_by_month': [
+        ("SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE month = ? AND year = ?", (4, 2025)),
+        ("SELECT COALESCE(SUM(amount), 0) FROM income WHERE month = ? AND year = ?", (4, 2025)),
+    ],
+    'show_by_date': [
+        ("SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE date = ?", ('2025-04-30',)),
+        ("SELECT COALESCE(SUM(amount), 0) FROM income WHERE date = ?", ('2025-04-30',)),
+    ],
+    'show_by_category': [
+        ("SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE category = ?", ('heart',)),
+        ("SELECT 1 FROM expenses WHERE category = ? LIMIT 1", ('heart',)),
+    ],
+}
+
+
+def seed(conn, rows):
+    """Creates the version-1 tables (no indexes) and fills them with random rows."""
+    migrate(conn, target=1)
+    rng = random.Random(0)
+    start = date(2015, 1, 1)
+
+    def random_rows(with_category):
+        for _ in range(rows):
+            day = start + timedelta(days=rng.randrange(4000))
+            amount = round(rng.uniform(10, 5000), 2)
+            if with_category:
+                yield day.isoformat(), rng.choice(CATEGORIES), day.month, day.year, amount
+            else:
+                yield day.isoformat(), '12:00:00', day.month, day.year, amount
+
+    conn.executemany("INSERT INTO expenses (date, category, month, year, amount) VALUES (?, ?, ?, ?, ?)",
+                     random_rows(True))
+    conn.executemany("INSERT INTO income (date, time, month, year, amount) VALUES (?, ?, ?, ?, ?)",
+                     random_rows(False))
+    conn.commit()
+
+
+def time_handlers(conn, repeat=5):
+    timings = {}
+    for handler, queries in HANDLER_QUERIES.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for sql, params in queries:
+                conn.execute(sql, params).fetchone()
+            best = min(best, time.perf_counter() - start)
+        timings[handler] = best
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        seed(conn, rows)
+        print(f"Seeded {rows} expenses and {rows} income rows in {time.perf_counter() - start:.1f}s")
+
+        before = time_handlers(conn)
+        start = time.perf_counter()
+        version = migrate(conn, target=2) # Later migrations change the schema these queries read
+        print(f"Migrated to schema version {version} in {time.perf_counter() - start:.1f}s\n")
+        after = time_handlers(conn)
+
+        print(f"{'handler':<17} {'before':>10} {'after':>10}")
+        for handler in HANDLER_QUERIES:
+            print(f"{handler:<17} {before[handler] * 1000:>8.1f}ms {after[handler] * 1000:>8.2f}ms")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: serving stored insights vs. computing them per chat request, and
+what the background scheduler spends keeping them current.
+
+1. One large ledger (`rows` expenses plus a tenth as many income rows over
+   the five years up to today): computing the insights (what a chat request
+   would pay without the scheduler), checking an unchanged ledger's
+   watermark, and load_insights() (what the chat intent pays).
+2. `users` small ledger files (`user_rows` rows each): the scheduler's first
+   sweep (computes all), a sweep with nothing changed, and a run after 1% of
+   the users wrote a row (only those are recomputed).
+
+Run from the repo root:  python backend/benchmarks/bench_insights.py [rows] [users] [user_rows] [repeat]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import connect
+from insights import InsightsScheduler, compute_insights, load_insights, refresh_insights
+from ledger import EXPENSE_INSERT, INCOME_INSERT, expense_row, income_row
+from migrations import migrate
+
+CATEGORIES = ['food', 'transport', 'groceries', 'stationery', 'outing', 'heart', 'others']
+DAYS = 5 * 365
+
+
+def fill(path, rows, seed=0):
+    conn = connect(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn)
+    rng = random.Random(seed)
+    first = date.today() - timedelta(days=DAYS - 1)
+
+    def ledger(n, expense):
+        for _ in range(n):
+            day = first + timedelta(days=rng.randrange(DAYS))
+            amount = rng.randrange(500, 500000) / 100
+            yield expense_row(day, rng.choice(CATEGORIES), amount) if expense else income_row(day, amount)
+
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany(EXPENSE_INSERT, ledger(rows, True))
+    conn.executemany(INCOME_INSERT, ledger(rows // 10, False))
+    conn.commit()
+    return conn
+
+
+def best(run, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    user_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    repeat = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        conn = fill(os.path.join(tmp, 'large.db'), rows)
+        print(f"Filled one ledger with {rows:,} expenses + {rows // 10:,} income rows "
+              f"in {time.perf_counter() - started:.1f}s")
+        compute = best(lambda: compute_insights(conn), repeat)
+        refresh_insights(conn)
+        unchanged = best(lambda: refresh_insights(conn), repeat)
+        load = best(lambda: load_insights(conn), repeat * 50)
+        conn.close()
+        print(f"{'compute insights (per request without the scheduler)':<56} {compute * 1000:>9.2f}ms")
+        print(f"{'refresh, ledger unchanged (watermark check)':<56} {unchanged * 1000:>9.2f}ms")
+        print(f"{'load stored insights (the chat intent)':<56} {load * 1000:>9.3f}ms")
+        print(f"{'speedup of the chat intent':<56} {compute / load:>9.0f}x\n")
+
+        directory = os.path.join(tmp, 'users')
+        os.makedirs(directory)
+        paths = [os.path.join(directory, f"user_{n:04d}.db") for n in range(users)]
+        started = time.perf_counter()
+        for n, path in enumerate(paths):
+            fill(path, user_rows, seed=n).close()
+        print(f"Filled {users} user ledgers with {user_rows:,} expenses + {user_rows // 10:,} income rows each "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        scheduler = InsightsScheduler(lambda: paths, interval=3600, sweep_interval=3600)
+        while scheduler.runs == 0: # Its thread sweeps once at start
+            time.sleep(0.01)
+        print(f"{'first sweep, computes every ledger':<56} {scheduler.last_run_ms:>9.1f}ms")
+        scheduler.run_once(sweep=True)
+        print(f"{'sweep, nothing changed':<56} {scheduler.last_run_ms:>9.1f}ms")
+        written = random.Random(1).sample(paths, max(1, users // 100))
+        for path in written:
+            conn = connect(path)
+            conn.execute(EXPENSE_INSERT, expense_row(date.today(), 'heart', 250))
+            conn.commit()
+            conn.close()
+            scheduler.mark(path)
+        refreshed = scheduler.run_once()
+        print(f"{f'run after {len(written)} users wrote, {refreshed} recomputed':<56} {scheduler.last_run_ms:>9.1f}ms")
+        scheduler.close()
+        print(f"Scheduler totals: {scheduler.stats()}")
+
+
+if __name__ == '__main__':
+    main()
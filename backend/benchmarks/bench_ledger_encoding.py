@@ -0,0 +1,147 @@
+"""Benchmark: ledger storage before and after the compact encoding (migration 4).
+
+Fills a temporary database at schema version 3 (TEXT dates next to month/year
+columns, REAL amounts) with `rows` expenses plus a tenth as many income rows
+over five years, copies it and migrates the copy to the compact encoding
+(integer day numbers and paise). Both files are VACUUMed, then compared on:
+  - size on disk, split into table rows and indexes (dbstat)
+  - aggregate queries over the ledger itself (best of `repeat` runs):
+    full-table totals, a quarter's total, a year's totals per month (by the
+    generated month column, and by month day ranges: *) and a full scan of
+    every row's date and amount into Python
+  - how far the float SUM(amount) drifts from the exact total
+
+Run from the repo root:  python backend/benchmarks/bench_ledger_encoding.py [rows] [repeat]
+"""
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ledger import day_number, from_paise
+from migrations import migrate
+
+CATEGORIES = ['food', 'transport', 'groceries', 'stationery', 'outing', 'heart', 'others']
+YEARS = 5
+FIRST = date(2021, 1, 1)
+
+# (name, SQL on the version-3 schema, SQL on the compact schema)
+QUERIES = [
+    ('total spent',
+     ("SELECT SUM(amount) FROM expenses", ()),
+     ("SELECT SUM(paise) FROM expenses", ())),
+    ('quarter total',
+     ("SELECT SUM(amount) FROM expenses WHERE date BETWEEN ? AND ?", ('2024-01-01', '2024-03-31')),
+     ("SELECT SUM(paise) FROM expenses WHERE day BETWEEN ? AND ?", (day_number('2024-01-01'), day_number('2024-03-31')))),
+    ('year by month',
+     ("SELECT month, SUM(amount) FROM expenses WHERE year = ? GROUP BY month", (2024,)),
+     ("SELECT month, SUM(paise) FROM expenses WHERE day BETWEEN ? AND ? GROUP BY month",
+      (day_number('2024-01-01'), day_number('2024-12-31')))),
+    # The same through the day index: one range per month instead of deriving each row's month
+    ('year by month*',
+     ("SELECT month, SUM(amount) FROM expenses WHERE year = ? GROUP BY month", (2024,)),
+     (" UNION ALL ".join(f"SELECT {m}, SUM(paise) FROM expenses WHERE day BETWEEN ? AND ?" for m in range(1, 13)),
+      tuple(day for m in range(1, 13) for day in (day_number(date(2024, m, 1)),
+                                                  day_number(date(2024 + m // 12, m % 12 + 1, 1)) - 1)))),
+    ('scan all rows',
+     ("SELECT date, amount FROM expenses", ()),
+     ("SELECT day, paise FROM expenses", ())),
+]
+
+
+def fill(path, rows):
+    conn = sqlite3.connect(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn, target=3)
+    rng = random.Random(0)
+    exact = Decimal(0)
+
+    def ledger(n, expense):
+        nonlocal exact
+        for _ in range(n):
+            day = FIRST + timedelta(days=rng.randrange(YEARS * 365))
+            amount = rng.randrange(500, 500000) / 100 # Whole paise, like amounts users type
+            if expense:
+                exact += Decimal(str(amount))
+                yield day.isoformat(), rng.choice(CATEGORIES), day.month, day.year, amount
+            else:
+                yield day.isoformat(), '12:00:00', day.month, day.year, amount
+
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany("INSERT INTO expenses (date, category, month, year, amount) VALUES (?, ?, ?, ?, ?)",
+                     ledger(rows, True))
+    conn.executemany("INSERT INTO income (date, time, month, year, amount) VALUES (?, ?, ?, ?, ?)",
+                     ledger(rows // 10, False))
+    conn.commit()
+    conn.close()
+    return exact
+
+
+def sizes(path):
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    pages = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    conn.close()
+    tables = sum(pages.get(t, 0) for t in ('expenses', 'income'))
+    indexes = sum(size for name, size in pages.items() if name.startswith('idx_'))
+    return os.path.getsize(path), tables, indexes
+
+
+def best_time(conn, sql, params, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, 'v3.db'), os.path.join(tmp, 'compact.db')
+        started = time.perf_counter()
+        exact = fill(old_path, rows)
+        print(f"Filled {rows:,} expenses + {rows // 10:,} income rows in {time.perf_counter() - started:.1f}s")
+        shutil.copyfile(old_path, new_path)
+        conn = sqlite3.connect(new_path)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            version = migrate(conn)
+        print(f"Migrated the copy to schema version {version} in {time.perf_counter() - started:.1f}s\n")
+        conn.close()
+
+        print(f"{'':<14} {'file':>9} {'table rows':>11} {'indexes':>9}")
+        for name, path in (('version 3', old_path), ('compact', new_path)):
+            total, tables, indexes = sizes(path)
+            print(f"{name:<14} {total / 1e6:>7.1f}MB {tables / 1e6:>9.1f}MB {indexes / 1e6:>7.1f}MB")
+
+        old, new = sqlite3.connect(old_path), sqlite3.connect(new_path)
+        print(f"\n{'query':<14} {'version 3':>10} {'compact':>10} {'speedup':>8}")
+        for name, (old_sql, old_params), (new_sql, new_params) in QUERIES:
+            old_time, old_result = best_time(old, old_sql, old_params, repeat)
+            new_time, new_result = best_time(new, new_sql, new_params, repeat)
+            print(f"{name:<14} {old_time * 1000:>8.1f}ms {new_time * 1000:>8.1f}ms {old_time / new_time:>7.2f}x")
+            if name == 'total spent':
+                float_total, paise_total = old_result[0][0], new_result[0][0]
+        old.close()
+        new.close()
+
+    print(f"\nExact total spent:         {exact}")
+    print(f"SUM(amount), REAL:         {float_total!r} (off by {abs(Decimal(repr(float_total)) - exact)})")
+    print(f"SUM(paise) / 100, INTEGER: {from_paise(paise_total):.2f} (off by "
+          f"{abs(Decimal(paise_total) / 100 - exact)})")
+
+
+if __name__ == '__main__':
+    main()
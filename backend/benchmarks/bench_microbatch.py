@@ -0,0 +1,75 @@
+"""Benchmark: per-request predict vs. MicroBatcher under concurrent callers.
+
+Run from the repo root:  python backend/benchmarks/bench_microbatch.py [threads] [window_ms]
+"""
+import csv
+import os
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import joblib
+
+from inference import MicroBatcher
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+MODEL_DIR = os.path.join(ROOT, 'chatbot', 'vectorized_set')
+
+
+def run(predict, messages, threads):
+    """Each thread sends its share of messages one at a time; returns (seconds, latencies)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        local = []
+        for text in chunk:
+            start = time.perf_counter()
+            predict(text)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(messages[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name, elapsed, latencies):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{name:<14} {len(latencies) / elapsed:>9.0f} msg/s   p50 {p50:6.2f}ms   p99 {p99:6.2f}ms")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    window_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    warnings.filterwarnings('ignore')
+    model = joblib.load(os.path.join(MODEL_DIR, 'intent_model_v3.pkl'))
+    vectorizer = joblib.load(os.path.join(MODEL_DIR, 'tfidf_vectorizer_v3.pkl'))
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        messages = [row['text'] for row in csv.DictReader(f) if row.get('text')] * 3
+
+    def predict_one(text):
+        return model.predict(vectorizer.transform([text]))[0]
+
+    def predict_batch(texts):
+        return list(model.predict(vectorizer.transform(texts)))
+
+    print(f"{len(messages)} messages from {threads} threads, window {window_ms}ms")
+    report("per-request", *run(predict_one, messages, threads))
+    batcher = MicroBatcher(predict_batch, max_batch_size=threads, max_wait=window_ms / 1000)
+    report("micro-batched", *run(batcher.predict, messages, threads))
+    batcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: total memory of N forked workers, private .npz load vs. shared mmap load.
+
+Uses a synthetic model with a large vocabulary (the shipped one is too small to
+show a difference). Linux only: reads PSS from /proc/self/smaps_rollup.
+
+Run from the repo root:  python backend/benchmarks/bench_mmap_workers.py [n_terms]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from compact_model import FORMAT_VERSION, load_compact_model, unpack_mmap_dir, warm_page_cache
+
+N_CLASSES = 8
+MESSAGES = ['spent 200 on food today', 'show my balance', 'term123 term4567 term99999 hello'] * 50
+
+
+def write_synthetic_model(path, n_terms):
+    rng = np.random.default_rng(0)
+    np.savez(
+        path,
+        format_version=np.int64(FORMAT_VERSION),
+        terms=np.asarray([f'term{i}' for i in range(n_terms)], dtype=str),
+        idf=rng.random(n_terms) + 1.0,
+        token_pattern=np.asarray(r'(?u)\b\w\w+\b'),
+        ngram_range=np.asarray((1, 1), dtype=np.int64),
+        lowercase=np.bool_(True),
+        stop_words=np.asarray([], dtype=str),
+        norm=np.asarray('l2'),
+        use_idf=np.bool_(True),
+        sublinear_tf=np.bool_(False),
+        binary=np.bool_(False),
+        classes=np.asarray([f'intent{i}' for i in range(N_CLASSES)], dtype=str),
+        coef=rng.standard_normal((N_CLASSES, n_terms)),
+        intercept=rng.standard_normal(N_CLASSES),
+    )
+
+
+def pss_kb():
+    with open('/proc/self/smaps_rollup') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+
+
+def worker(path, mmap, ready, done, results):
+    vectorizer, model = load_compact_model(path, mmap=mmap)
+    model.predict(vectorizer.transform(MESSAGES))
+    # Touch every page, as a long-running worker eventually would
+    float(np.asarray(model.coef_t).sum() + np.asarray(vectorizer.idf_).sum())
+    if mmap:
+        (vectorizer.vocabulary_.terms == '').any()
+    ready.wait()  # every worker is alive and loaded when PSS is read
+    results.put(pss_kb())
+    done.wait()
+
+
+def measure(path, mmap, n_workers):
+    ctx = multiprocessing.get_context('fork')
+    ready = ctx.Barrier(n_workers)
+    done = ctx.Event()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, mmap, ready, done, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    total = sum(results.get() for _ in procs)
+    done.set()
+    for p in procs:
+        p.join()
+    return total
+
+
+def main():
+    n_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as tmp:
+        npz_path = os.path.join(tmp, 'model.npz')
+        write_synthetic_model(npz_path, n_terms)
+        mmap_dir = unpack_mmap_dir(npz_path, os.path.join(tmp, 'model'))
+        warm_page_cache(mmap_dir)  # what the gunicorn on_starting hook does
+        size = sum(os.path.getsize(os.path.join(mmap_dir, f)) for f in os.listdir(mmap_dir))
+        print(f"Synthetic model: {n_terms} terms x {N_CLASSES} classes, {size / 2**20:.1f}MB of arrays")
+        print(f"{'workers':>7} {'npz total PSS':>14} {'mmap total PSS':>15}")
+        for n_workers in (1, 2, 4, 8):
+            private = measure(npz_path, False, n_workers)
+            shared = measure(mmap_dir, True, n_workers)
+            print(f"{n_workers:>7} {private / 1024:>12.1f}MB {shared / 1024:>13.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
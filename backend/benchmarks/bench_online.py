@@ -0,0 +1,73 @@
+"""Benchmark: online (hashed + SGD) intent model vs. the batch TF-IDF + LogisticRegression.
+
+Splits the dataset 80/20, trains both on the 80%, and compares holdout accuracy.
+Then feeds the online model a stream of corrections (holdout messages with
+their true intent, repeated) and reports:
+  - the cost of one learn() call as corrections accumulate (should stay flat)
+  - how many of the corrected messages it now gets right
+  - holdout accuracy afterwards (replay keeps it from forgetting)
+
+Run from the repo root:  python backend/benchmarks/bench_online.py [corrections]
+"""
+import csv
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from online import OnlineIntentModel
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+REPORT_AT = (1, 10, 100, 1000, 5000, 10000)
+
+
+def accuracy(predict, rows):
+    predicted = predict([text for text, _ in rows])
+    return sum(p == intent for p, (_, intent) in zip(predicted, rows)) / len(rows)
+
+
+def main():
+    corrections = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    warnings.filterwarnings('ignore')
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        rows = [(row['text'], row['intent']) for row in csv.DictReader(f) if row.get('text') and row.get('intent')]
+    random.Random(0).shuffle(rows)
+    split = int(len(rows) * 0.8)
+    train, holdout = rows[:split], rows[split:]
+
+    vectorizer = TfidfVectorizer()
+    batch = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform([t for t, _ in train]), [i for _, i in train])
+    online = OnlineIntentModel({intent for _, intent in rows})
+    start = time.perf_counter()
+    online.fit_initial([t for t, _ in train], [i for _, i in train])
+    print(f"Initial online training on {len(train)} messages: {(time.perf_counter() - start) * 1000:.0f}ms")
+    predict_online = lambda texts: online.predict(online.transform(texts))
+    print(f"Holdout accuracy ({len(holdout)} messages): TF-IDF+LR {accuracy(lambda t: batch.predict(vectorizer.transform(t)), holdout):.3f}, "
+          f"online {accuracy(predict_online, holdout):.3f}")
+
+    wrong_before = [(t, i) for (t, i), p in zip(holdout, predict_online([t for t, _ in holdout])) if p != i]
+    print(f"\n{'corrections':>11} {'learn() cost':>13}")
+    stream = holdout * (corrections // len(holdout) + 1)
+    window = []
+    for n, (text, intent) in enumerate(stream[:corrections], start=1):
+        start = time.perf_counter()
+        online.learn(text, intent)
+        window.append(time.perf_counter() - start)
+        if n in REPORT_AT:
+            print(f"{n:>11} {sum(window) / len(window) * 1000:>11.2f}ms")
+            window = []
+    if wrong_before:
+        fixed = sum(p == i for (_, i), p in zip(wrong_before, predict_online([t for t, _ in wrong_before])))
+        print(f"\nMessages misclassified before correction: {len(wrong_before)}, now right: {fixed}")
+    print(f"Training-set accuracy after {corrections} corrections: {accuracy(predict_online, train):.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark: per-message routing and extraction, rescanning vs. parse-once MessageFeatures.
+
+For every dataset message, runs the rule router and then the extraction its
+labelled intent's handler needs (amount, category, date, month/year), first
+the old way (each step lowercases and regex-searches the raw text again,
+extract_month rebuilding its month tables per call), then through one
+MessageFeatures. Also checks that both give the same answers. Logging is left
+out of both.
+
+Run from the repo root:  python backend/benchmarks/bench_preprocess.py [repeats]
+"""
+import calendar
+import csv
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dates import extract_date
+from extractors import match_category
+from features import MessageFeatures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+
+# The rule router and extractors as they were before MessageFeatures
+date_pattern = r'\b(on|for|summary)\s+(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})\b'
+month_pattern = r'\b(january|february|march|april|may|june|july|august|september|october|november|december|jan|feb|mar|apr|jun|jul|aug|sep|oct|nov|dec)\b'
+year_pattern = r'\b(20\d{2})\b'
+ROUTE_WORDS = ['show', 'what', 'how much', 'summary', 'spent', 'income', 'expenses', 'records', 'details']
+
+
+def legacy_rule(user_input):
+    text = user_input.lower()
+    if re.search(date_pattern, text) and any(kw in text for kw in ROUTE_WORDS):
+        return 'show_by_date'
+    elif re.search(month_pattern, text) and not re.search(date_pattern, text) and \
+            any(kw in text for kw in ROUTE_WORDS + ['month', 'monthly']):
+        re.search(year_pattern, text)
+        return 'show_by_month'
+    return None
+
+
+def legacy_amount(text):
+    match = re.search(r'\b\d+(\.\d{1,2})?\b', text)
+    return float(match.group()) if match else None
+
+
+def legacy_month(text):
+    month_map = {name.lower(): num for num, name in enumerate(calendar.month_name) if num}
+    month_abbr_map = {name.lower(): num for num, name in enumerate(calendar.month_abbr) if num}
+    month_map.update(month_abbr_map)
+    for word in text.lower().split():
+        if word in month_map:
+            return month_map[word]
+    return None
+
+
+def legacy_message(text, intent):
+    rule = legacy_rule(text)
+    intent = rule or intent
+    if intent == 'add_expense':
+        others = re.search(r'\bothers\b', text.lower())
+        return rule, legacy_amount(text), match_category(text)[0], extract_date(text)[0], bool(others)
+    if intent == 'add_income':
+        return rule, legacy_amount(text), extract_date(text)[0]
+    if intent == 'show_by_category':
+        return rule, match_category(text)
+    if intent == 'show_by_month':
+        year = re.search(r'\b(20\d{2})\b', text)
+        return rule, legacy_month(text), int(year.group(1)) if year else None
+    if intent == 'show_by_date':
+        return rule, extract_date(text)[0]
+    return rule,
+
+
+def features_rule(message):
+    if message.has_date_phrase and message.contains(*ROUTE_WORDS):
+        return 'show_by_date'
+    elif message.has_month_name and not message.has_date_phrase and \
+            message.contains(*ROUTE_WORDS, 'month', 'monthly'):
+        return 'show_by_month'
+    return None
+
+
+def features_message(text, intent):
+    message = MessageFeatures(text)
+    rule = features_rule(message)
+    intent = rule or intent
+    if intent == 'add_expense':
+        return rule, message.amount, message.category, message.date[0], message.mentions_others
+    if intent == 'add_income':
+        return rule, message.amount, message.date[0]
+    if intent == 'show_by_category':
+        return rule, message.category_match
+    if intent == 'show_by_month':
+        return rule, message.month, message.year
+    if intent == 'show_by_date':
+        return rule, message.date[0]
+    return rule,
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        rows = [(row['text'], row['intent']) for row in csv.DictReader(f) if row.get('text')]
+    # extract_date logs every call; keep the timings about parsing
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        mismatches = [text for text, intent in rows if legacy_message(text, intent) != features_message(text, intent)]
+        timings = {}
+        for name, run in (('rescanning', legacy_message), ('MessageFeatures', features_message)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                for text, intent in rows:
+                    run(text, intent)
+            timings[name] = (time.perf_counter() - start) / (repeats * len(rows))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    print(f"{len(rows)} dataset messages x {repeats}, {len(mismatches)} differing results")
+    for text in mismatches[:10]:
+        print(f"  {text!r}")
+    for name, seconds in timings.items():
+        print(f"{name:<16} {seconds * 1e6:>8.1f}us per message")
+
+
+if __name__ == '__main__':
+    main()
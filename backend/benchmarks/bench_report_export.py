@@ -0,0 +1,125 @@
+"""Benchmark: streaming /report exports vs. building the whole result in memory.
+
+Fills a temporary database with `rows` expenses plus a tenth as many income
+rows spread over three years, then exports all three years two ways for each
+report (all rows, totals by week):
+  - buffered: fetchall() and one big CSV string, as a non-streaming endpoint would
+  - streamed: reports.stream_report(), fetchmany() chunks through a generator
+For each, reports the time until the first data rows are out (not just the
+CSV header), the total time and the peak
+Python memory (tracemalloc, measured in a separate pass since it slows things).
+
+Run from the repo root:  python backend/benchmarks/bench_report_export.py [rows]
+"""
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import PRAGMAS, ConnectionPool
+from ledger import EXPENSE_INSERT, INCOME_INSERT, expense_row, from_paise, income_row
+from migrations import migrate
+from reports import Report, stream_report
+
+CATEGORIES = ['food', 'transport', 'groceries', 'stationery', 'outing', 'heart', 'others']
+START, END = '2023-01-01', '2025-12-31'
+
+
+def fill(path, rows):
+    pool = ConnectionPool(path, size=1, pragmas={**PRAGMAS, 'synchronous': 'OFF'})
+    conn = pool.acquire()
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn)
+    rng = random.Random(0)
+    first = date(2023, 1, 1)
+
+    def ledger(n, expense):
+        for _ in range(n):
+            day = first + timedelta(days=rng.randrange(3 * 365))
+            amount = round(rng.uniform(5, 500), 2)
+            if expense:
+                yield expense_row(day, rng.choice(CATEGORIES), amount)
+            else:
+                yield income_row(day, amount)
+
+    conn.executemany(EXPENSE_INSERT, ledger(rows, True))
+    conn.executemany(INCOME_INSERT, ledger(rows // 10, False))
+    conn.commit()
+    pool.release(conn)
+    return pool
+
+
+def buffered(conn, report):
+    query, params = report.sql()
+    rows = conn.execute(query, params).fetchall()
+    if report.group == 'week':
+        totals = {}
+        for kind, _, _, _, paise, period, _ in rows:
+            entry = totals.setdefault(period, [0, 0, 0, 0])
+            offset = 0 if kind == 'expense' else 2
+            entry[offset] += paise
+            entry[offset + 1] += 1
+        rows = [(p, from_paise(e), ec, from_paise(i), ic, from_paise(i - e)) for p, (e, ec, i, ic) in sorted(totals.items())]
+    else:
+        rows = [row[:5] for row in rows]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(report.columns)
+    writer.writerows(rows)
+    yield out.getvalue()
+
+
+def streamed(conn, report):
+    return stream_report(conn, report, 'csv')
+
+
+def measure(pool, run, report, trace):
+    conn = pool.connect()
+    try:
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        first = None
+        size = lines = 0
+        for chunk in run(conn, report):
+            size += len(chunk)
+            lines += chunk.count('\n')
+            if first is None and lines > 1: # Past the header
+                first = time.perf_counter() - started
+        total = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        return first, total, size, peak
+    finally:
+        if trace:
+            tracemalloc.stop()
+        conn.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        pool = fill(os.path.join(tmp, 'ledger.db'), rows)
+        print(f"Filled {rows} expenses + {rows // 10} income rows in {time.perf_counter() - started:.1f}s; "
+              f"exporting {START}..{END}")
+        print(f"{'report':<7} {'mode':<9} {'first rows':>12} {'total':>8} {'output':>9} {'peak memory':>12}")
+        for group in (None, 'week'):
+            report = Report(START, END, group=group)
+            for name, run in (('buffered', buffered), ('streamed', streamed)):
+                first, total, size, _ = measure(pool, run, report, trace=False)
+                peak = measure(pool, run, report, trace=True)[3]
+                print(f"{group or 'rows':<7} {name:<9} {first * 1000:>10.1f}ms {total:>7.2f}s "
+                      f"{size / 1e6:>7.1f}MB {peak / 1e6:>10.1f}MB")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
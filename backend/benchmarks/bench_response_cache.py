@@ -0,0 +1,108 @@
+"""Benchmark: dashboard-style polling of read intents with and without the response cache.
+
+Repeatedly asks the four read intents a dashboard would poll (balance, this
+month, a date, a category) through respond_to_intent, as /chat does after
+routing, against a temporary copy of the repo's database. Every SQL statement
+reaching SQLite is counted with a trace callback. Runs with the cache off,
+on, and on with an expense added every `write_every` polls (which must
+invalidate exactly the affected replies). Reports polls/s and SQL statements
+per poll, and checks the cached replies match the uncached ones.
+
+Run from the repo root:  python backend/benchmarks/bench_response_cache.py [polls] [write_every]
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from db import ConnectionPool
+from migrations import migrate
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATABASE = os.path.join(ROOT, 'chatbot', 'database', 'fund_manager.db')
+DASHBOARD = [
+    ('check_balance', 'show my balance'),
+    ('show_by_month', 'summary for april 2025'),
+    ('show_by_date', 'show summary on 2025-04-30'),
+    ('show_by_category', 'show expenses for food'),
+]
+WRITE = ('add_expense', 'paid 300 for pizza 2025-04-30')
+
+
+class CountingPool(ConnectionPool):
+    statements = 0
+
+    def connect(self):
+        conn = super().connect()
+        conn.set_trace_callback(self._count)
+        return conn
+
+    def _count(self, statement):
+        CountingPool.statements += 1
+
+
+def run(backend2, polls, write_every):
+    from features import MessageFeatures
+    dashboard = [(intent, MessageFeatures(text)) for intent, text in DASHBOARD]
+    write = (WRITE[0], MessageFeatures(WRITE[1]))
+    replies = []
+    CountingPool.statements = 0 # Counts from here, after the migration
+    started = time.perf_counter()
+    for poll in range(1, polls + 1):
+        with backend2.app.app_context():
+            replies.append([backend2.respond_to_intent(intent, message) for intent, message in dashboard])
+            if write_every and poll % write_every == 0:
+                backend2.respond_to_intent(*write)
+    elapsed = time.perf_counter() - started
+    failed = [reply for poll in replies for reply in poll if reply.startswith('❌')]
+    if failed:
+        raise RuntimeError(f"Handlers failed: {failed[0]}")
+    return polls / elapsed, CountingPool.statements / polls, replies
+
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    write_every = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        # Start the app on a copy too, so its start-up migration, per-user
+        # directory and cache generation file stay out of the real ledger's
+        # directory; no insights sweeps while timing
+        startup = os.path.join(tmp, 'startup.db')
+        shutil.copyfile(DATABASE, startup)
+        os.environ.update(FUNDMATE_DB_PATH=startup, FUNDMATE_INSIGHTS_INTERVAL_S='0')
+        # backend2 logs every request; keep the output to the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            import backend2
+            results = {}
+            for name, size, writes in (('cache off', 0, 0), ('cache on', 4096, 0),
+                                       ('cache off+writes', 0, write_every), ('cache on+writes', 4096, write_every)):
+                # Same starting ledger for every run
+                path = os.path.join(tmp, f"{name}.db")
+                shutil.copyfile(DATABASE, path)
+                backend2.db_pool = CountingPool(path)
+                conn = backend2.db_pool.acquire()
+                migrate(conn) # Rollup tables the handlers read
+                backend2.db_pool.release(conn)
+                backend2.response_cache.maxsize = size
+                backend2.response_cache.clear()
+                results[name] = run(backend2, polls, writes)
+                backend2.db_pool.close()
+        stats = backend2.response_cache.stats()
+
+    print(f"{polls} polls of {len(DASHBOARD)} read intents; writes every {write_every} polls in the +writes runs")
+    print(f"{'run':<18} {'polls/s':>9} {'SQL per poll':>13}")
+    for name, (rate, statements, _) in results.items():
+        print(f"{name:<18} {rate:>9.0f} {statements:>13.2f}")
+    for cached, uncached in (('cache on', 'cache off'), ('cache on+writes', 'cache off+writes')):
+        same = results[cached][2] == results[uncached][2]
+        print(f"{cached} replies identical to {uncached}: {same}")
+    print(f"Cache counters (all runs): {stats}")
+
+
+if __name__ == '__main__':
+    main()
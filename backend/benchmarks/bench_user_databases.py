@@ -0,0 +1,88 @@
+"""Benchmark: concurrent expense inserts into one shared file vs. per-user files.
+
+A fixed number of writer threads each insert rows for one of `users` users
+(thread i writes for user i % users) with a commit per row, as /chat does.
+"shared" puts every user in one file, so all commits queue on its write lock;
+"per-user" gives each user their own file through UserDatabases. Commits use
+the backend's default synchronous=FULL (an fsync per commit); pass "normal"
+for FUNDMATE_DB_SYNCHRONOUS=NORMAL.
+
+Run from the repo root:  python backend/benchmarks/bench_user_databases.py [threads] [normal]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import db
+from db import ConnectionPool, UserDatabases
+from ledger import EXPENSE_INSERT, expense_row
+from migrations import migrate
+
+DURATION = 2.0
+USER_COUNTS = (1, 2, 4, 8, 16)
+ROW = expense_row('2025-04-30', 'food', 12.5)
+
+
+def quiet_migrate(conn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn)
+
+
+def run(pool_for, threads, users):
+    counts = []
+    lock = threading.Lock()
+    stop = time.monotonic() + DURATION
+
+    def worker(user_id):
+        pool = pool_for(user_id)
+        n = 0
+        while time.monotonic() < stop:
+            conn = pool.acquire()
+            try:
+                conn.execute(EXPENSE_INSERT, ROW)
+                conn.commit()
+            finally:
+                pool.release(conn)
+            n += 1
+        with lock:
+            counts.append(n)
+
+    workers = [threading.Thread(target=worker, args=(f"user{i % users}",)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / DURATION
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    synchronous = 'NORMAL' if 'normal' in sys.argv[2:] else 'FULL'
+    db.PRAGMAS['synchronous'] = synchronous # New pools pick this up as their default
+    print(f"{threads} writer threads, {DURATION:.0f}s per run, synchronous={synchronous}")
+    print(f"{'users':>5} {'shared writes/s':>16} {'per-user writes/s':>18}")
+    for users in USER_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = ConnectionPool(os.path.join(tmp, 'shared.db'), size=threads)
+            conn = shared.acquire()
+            quiet_migrate(conn)
+            shared.release(conn)
+            shared_rate = run(lambda user_id: shared, threads, users)
+            shared.close()
+
+            user_dbs = UserDatabases(os.path.join(tmp, 'users'), pool_size=threads, migrate=quiet_migrate)
+            for i in range(users):
+                user_dbs.pool(f"user{i}") # Create and migrate the files up front
+            per_user_rate = run(user_dbs.pool, threads, users)
+            user_dbs.close()
+        print(f"{users:>5} {shared_rate:>16.0f} {per_user_rate:>18.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark: in-process message analysis vs. ForkedWorkerPool under concurrent callers.
+
+Each message goes through what backend2 hands the workers: the parse
+(MessageFeatures), the category and date extraction, and the model. Messages
+are built by joining dataset lines into long texts, so that work dominates
+over pipe overhead (the CPU-heavy case the pool is for).
+Also reports each worker's private (unshared) memory to show the model pages
+stay shared copy-on-write. Scaling is bounded by the number of cores.
+
+Run from the repo root:  python backend/benchmarks/bench_worker_pool.py [threads] [words_per_message]
+"""
+import csv
+import os
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import joblib
+
+from features import MessageFeatures
+from inference import ForkedWorkerPool
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+DATASET = os.path.join(ROOT, 'chatbot', 'dataset', 'fundsmanager_augmented_1050_with_heart(1).csv')
+MODEL_DIR = os.path.join(ROOT, 'chatbot', 'vectorized_set')
+WORKER_COUNTS = (1, 2, 4)
+MESSAGES = 2000
+
+
+def run(analyze, messages, threads):
+    """Each thread analyzes its share one message at a time; returns msg/s."""
+    def worker(chunk):
+        for text in chunk:
+            analyze([text])
+
+    workers = [threading.Thread(target=worker, args=(messages[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return len(messages) / (time.perf_counter() - start)
+
+
+def private_kb(pid):
+    """Private_Clean + Private_Dirty from smaps_rollup: memory not shared with the parent."""
+    total = 0
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1])
+    return total
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    warnings.filterwarnings('ignore')
+    model = joblib.load(os.path.join(MODEL_DIR, 'intent_model_v3.pkl'))
+    vectorizer = joblib.load(os.path.join(MODEL_DIR, 'tfidf_vectorizer_v3.pkl'))
+    with open(DATASET, newline='', encoding='utf-8') as f:
+        vocabulary = ' '.join(row['text'] for row in csv.DictReader(f) if row.get('text')).split()
+    messages = [' '.join(vocabulary[(i * 37 + j) % len(vocabulary)] for j in range(words))
+                for i in range(MESSAGES)]
+
+    def analyze_texts(texts):
+        """(intent, category, date) per text; the parsed fields as the handlers would read them."""
+        results = []
+        for text, intent in zip(texts, model.predict(vectorizer.transform(texts))):
+            message = MessageFeatures(text)
+            results.append((intent, message.category, message.date[0]))
+        return results
+
+    # extract_date and match_category log every call, here and in the workers
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        print(f"{MESSAGES} messages of {words} words from {threads} threads, {os.cpu_count()} CPUs", file=stdout)
+        print(f"{'mode':<16} {'msg/s':>8} {'private KB/worker':>18}", file=stdout)
+        print(f"{'in-process':<16} {run(analyze_texts, messages, threads):>8.0f} {'-':>18}", file=stdout)
+        expected = analyze_texts(messages[:200])
+        for workers in WORKER_COUNTS:
+            pool = ForkedWorkerPool(analyze_texts, workers=workers)
+            assert pool.call(messages[:200]) == expected
+            rate = run(pool.call, messages, threads)
+            private = sum(private_kb(w.process.pid) for w in list(pool._idle.queue)) / workers
+            pool.close()
+            print(f"{f'pool x{workers}':<16} {rate:>8.0f} {private:>18.0f}", file=stdout)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Pure-NumPy scorer for the intent model exported by chatbot_code.py.
+
+The .npz artifact holds the TF-IDF vocabulary, IDF weights and LogisticRegression
+coefficients, so the backend can classify messages without importing sklearn or
+unpickling anything. CompactTfidfVectorizer/CompactLogisticRegression mirror the
+transform()/predict() calls backend2.py makes on the sklearn objects.
+
+For several worker processes, unpack_mmap_dir() writes the same arrays as one
+.npy file each (terms sorted, coefficients pre-transposed). load_compact_model()
+on that directory with mmap=True memory-maps them read-only, so every worker
+shares the same page-cache pages instead of holding a private copy.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+class SparseRows:
+    """Minimal CSR matrix: row i has weights data[indptr[i]:indptr[i+1]] at columns indices[...]."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def shape(self):
+        return (len(self.indptr) - 1,)
+
+
+class SortedVocabulary:
+    """Term -> column lookup over a sorted (possibly memory-mapped) array of terms.
+
+    Unlike a dict this needs no per-process Python objects, so the terms can stay
+    in shared pages; lookups are a binary search instead of a hash.
+    """
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def __len__(self):
+        return len(self.terms)
+
+    def columns(self, terms):
+        """Returns the column of each term, or -1 for terms outside the vocabulary."""
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        # Terms longer than the fixed-width array would be silently truncated
+        # (and could then equal a shorter vocabulary term), so they never match
+        width = self.terms.dtype.itemsize // np.dtype('U1').itemsize
+        fits = np.fromiter((len(t) <= width for t in terms), dtype=bool, count=len(terms))
+        queries = np.asarray([t if ok else '' for t, ok in zip(terms, fits)], dtype=self.terms.dtype)
+        cols = np.searchsorted(self.terms, queries)
+        cols[cols == len(self.terms)] = 0
+        return np.where(fits & (self.terms[cols] == queries), cols, -1)
+
+
+class CompactTfidfVectorizer:
+    """Reproduces sklearn's TfidfVectorizer.transform for word analyzers."""
+
+    def __init__(self, vocabulary, idf, token_pattern, ngram_range=(1, 1), lowercase=True,
+                 stop_words=(), norm='l2', use_idf=True, sublinear_tf=False, binary=False):
+        self.vocabulary_ = vocabulary
+        self.idf_ = idf
+        self.token_pattern = re.compile(token_pattern)
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+        self.stop_words = frozenset(stop_words)
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+    def _terms(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def transform(self, texts):
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            terms = self._terms(text)
+            if isinstance(self.vocabulary_, SortedVocabulary):
+                found = self.vocabulary_.columns(terms)
+            else:
+                found = np.fromiter((self.vocabulary_.get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+            cols, counts = np.unique(found[found >= 0], return_counts=True)
+            tf = counts.astype(np.float64)
+            if self.binary:
+                tf[:] = 1.0
+            elif self.sublinear_tf:
+                tf = np.log(tf) + 1.0
+            if self.use_idf:
+                tf = tf * self.idf_[cols]
+            if self.norm == 'l2':
+                length = np.sqrt(np.dot(tf, tf))
+            elif self.norm == 'l1':
+                length = np.abs(tf).sum()
+            else:
+                length = 0.0
+            if length > 0:
+                tf = tf / length
+            indices.append(cols)
+            data.append(tf)
+            indptr.append(indptr[-1] + len(cols))
+        return SparseRows(
+            np.asarray(indptr, dtype=np.int64),
+            np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+            np.concatenate(data) if data else np.empty(0, dtype=np.float64),
+        )
+
+
+class CompactLogisticRegression:
+    """Reproduces sklearn's LogisticRegression.predict from its coefficients."""
+
+    def __init__(self, classes, coef_t, intercept):
+        self.classes_ = classes
+        # (n_features, n_classes), so a row's terms gather contiguous rows
+        self.coef_t = coef_t
+        self.intercept_ = intercept
+
+    def decision_function(self, X):
+        n_rows = X.shape[0]
+        scores = np.tile(self.intercept_, (n_rows, 1))
+        if len(X.indices):
+            row_ids = np.repeat(np.arange(n_rows), np.diff(X.indptr))
+            np.add.at(scores, row_ids, X.data[:, None] * self.coef_t[X.indices])
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            # Binary models keep one coefficient row: positive score means classes_[1]
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+# Arrays worth memory-mapping; the rest are small settings read into memory
+MMAP_ARRAYS = ('terms', 'idf', 'coef_t')
+
+
+def _build(arrays, path):
+    version = int(arrays['format_version'])
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format {version} in {path} (expected {FORMAT_VERSION})")
+    if 'coef_t' in arrays:
+        # mmap directory: terms are sorted and coef is stored transposed
+        vocabulary = SortedVocabulary(arrays['terms'])
+        coef_t = arrays['coef_t']
+    else:
+        vocabulary = {str(term): i for i, term in enumerate(arrays['terms'])}
+        coef_t = np.ascontiguousarray(arrays['coef'].T)
+    vectorizer = CompactTfidfVectorizer(
+        vocabulary=vocabulary,
+        idf=arrays['idf'],
+        token_pattern=str(arrays['token_pattern']),
+        ngram_range=tuple(int(n) for n in arrays['ngram_range']),
+        lowercase=bool(arrays['lowercase']),
+        stop_words=[str(w) for w in arrays['stop_words']],
+        norm=str(arrays['norm']) or None,
+        use_idf=bool(arrays['use_idf']),
+        sublinear_tf=bool(arrays['sublinear_tf']),
+        binary=bool(arrays['binary']),
+    )
+    model = CompactLogisticRegression(
+        classes=arrays['classes'],
+        coef_t=coef_t,
+        intercept=arrays['intercept'],
+    )
+    return vectorizer, model
+
+
+def load_compact_model(path, mmap=False):
+    """Loads an exported .npz artifact or unpacked directory and returns (vectorizer, model).
+
+    With mmap=True a directory's large arrays are memory-mapped read-only.
+    """
+    if os.path.isdir(path):
+        arrays = {}
+        for filename in os.listdir(path):
+            name, ext = os.path.splitext(filename)
+            if ext == '.npy':
+                mode = 'r' if mmap and name in MMAP_ARRAYS else None
+                arrays[name] = np.load(os.path.join(path, filename), mmap_mode=mode, allow_pickle=False)
+        return _build(arrays, path)
+    with np.load(path, allow_pickle=False) as artifact:
+        return _build({name: artifact[name] for name in artifact.files}, path)
+
+
+# Written into an unpacked directory: the SHA-256 of the .npz it came from
+SOURCE_DIGEST_FILE = 'source.sha256'
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _unpacked_from(directory):
+    """The digest recorded in an unpacked directory, or None (missing, or unpacked by older code)."""
+    try:
+        with open(os.path.join(directory, SOURCE_DIGEST_FILE)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def unpack_mmap_dir(npz_path, directory):
+    """Writes the .npz artifact as one .npy per array, ready for mmap loading.
+
+    Does nothing if the directory was already unpacked from this exact .npz
+    (same SHA-256); after a retrain rewrites the .npz it is unpacked again.
+    The files are written to a temporary directory first and renamed into
+    place, so concurrent workers never see a half-written model. Workers
+    still mapping the old files keep them until they reload.
+    """
+    source = _file_digest(npz_path)
+    if _unpacked_from(directory) == source:
+        return directory
+    with np.load(npz_path, allow_pickle=False) as artifact:
+        arrays = {name: artifact[name] for name in artifact.files}
+    order = np.argsort(arrays['terms'])
+    arrays['terms'] = arrays['terms'][order]
+    arrays['idf'] = arrays['idf'][order]
+    arrays['coef_t'] = np.ascontiguousarray(arrays.pop('coef')[:, order].T)
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    staging = tempfile.mkdtemp(prefix='.unpack-', dir=parent)
+    stale = None
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, name + '.npy'), array, allow_pickle=False)
+        with open(os.path.join(staging, SOURCE_DIGEST_FILE), 'w') as f:
+            f.write(source + '\n')
+        if os.path.isdir(directory):
+            # Move the outdated unpack aside; rename can't replace a non-empty directory
+            stale = tempfile.mkdtemp(prefix='.stale-', dir=parent)
+            try:
+                os.rename(directory, os.path.join(stale, 'model'))
+            except FileNotFoundError:
+                pass # Another worker moved it first
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        # Another worker may have won the race to unpack the same artifact
+        if _unpacked_from(directory) != source:
+            raise
+    finally:
+        if stale is not None:
+            shutil.rmtree(stale, ignore_errors=True)
+    return directory
+
+
+def warm_page_cache(directory):
+    """Reads the mmap arrays once so forked workers find their pages already cached."""
+    for name in MMAP_ARRAYS:
+        with open(os.path.join(directory, name + '.npy'), 'rb') as f:
+            while f.read(1 << 20):
+                pass
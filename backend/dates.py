@@ -0,0 +1,171 @@
+"""Date extraction for chat messages.
+
+extract_date() turns a message into (YYYY-MM-DD, month, year). Precompiled
+patterns cover the phrases users actually type, so dateutil's fuzzy parser
+(the slowest step per message) only sees what they miss:
+
+    today, tonight, yesterday, tomorrow, day before yesterday
+    15th April, 15 Apr 2025, 15th of April, April 15, April 15th, 2025
+    15/04, 15-04-2025, 15/04/25 (day first, like dayfirst=True)
+    last monday, monday (the most recent one; a bare weekday may be today)
+
+match_date() is that fast path on its own: a datetime.date, or None when
+nothing matched.
+"""
+import calendar
+import re
+from datetime import date, datetime, timedelta
+
+from dateutil.parser import parse
+
+MONTHS = {name.lower(): num for num, name in enumerate(calendar.month_name) if num}
+MONTHS.update({name.lower(): num for num, name in enumerate(calendar.month_abbr) if num})
+MONTHS["sept"] = 9
+WEEKDAYS = {name.lower(): num for num, name in enumerate(calendar.day_name)}
+
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True)) # Longest first: "june" before "jun"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+
+DAY_MONTH = re.compile(rf"\b{_DAY}\s+(?:of\s+)?({_MONTH})\b\.?{_YEAR}")
+MONTH_DAY = re.compile(rf"\b({_MONTH})\.?\s+{_DAY}\b{_YEAR}")
+# Only / and - separators: "12.50" is an amount, not 12 May
+NUMERIC = re.compile(r"\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{4}|\d{2}))?\b")
+RELATIVE = re.compile(r"\b(day before yesterday|today|tonight|yesterday|tomorrow)\b")
+RELATIVE_DAYS = {"day before yesterday": -2, "today": 0, "tonight": 0, "yesterday": -1, "tomorrow": 1}
+WEEKDAY = re.compile(rf"\b(last\s+)?({'|'.join(WEEKDAYS)})\b")
+ISO_DATE = re.compile(r"\b(\d{4})[-/](\d{1,2})[-/](\d{1,2})\b")
+PARTIAL_DATE = re.compile(r"\b\d{1,2}[-/]\d{1,2}\b")
+YESTERDAY_TOMORROW = re.compile(r"\b(yesterday|tomorrow)\b")
+HAS_DIGIT = re.compile(r"\d")
+MONTH_WORD = re.compile(rf"\b({_MONTH})\b")
+# What dateutil can still read a date from: "15.04.2025", "the 5th", "april 2025"
+DATE_SHAPED = re.compile(rf"\b\d{{1,4}}([./-])\d{{1,2}}\1\d{{1,4}}\b|\b\d{{1,2}}(?:st|nd|rd|th)\b"
+                         rf"|\b(?:{_MONTH})\.?,?\s+\d{{4}}\b|\b\d{{4}}\s+(?:{_MONTH})\b")
+# Same as features.AMOUNT_PATTERN
+AMOUNT = re.compile(r"\b\d+(?:\.\d{1,2})?\b")
+
+
+def _make_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None # e.g. "add 50 march": 50 isn't a day
+
+
+def _year(text, today):
+    if not text:
+        return today.year
+    year = int(text)
+    return year + 2000 if year < 100 else year
+
+
+def match_date(text, today=None):
+    """Returns the date a message refers to, or None if no known phrase matched.
+
+    `text` should already be lowercased. `today` defaults to date.today().
+    """
+    today = today or date.today()
+    if HAS_DIGIT.search(text):
+        for m in DAY_MONTH.finditer(text):
+            found = _make_date(_year(m.group(3), today), MONTHS[m.group(2)], int(m.group(1)))
+            if found:
+                return found
+        for m in MONTH_DAY.finditer(text):
+            found = _make_date(_year(m.group(3), today), MONTHS[m.group(1)], int(m.group(2)))
+            if found:
+                return found
+        for m in NUMERIC.finditer(text):
+            found = _make_date(_year(m.group(3), today), int(m.group(2)), int(m.group(1)))
+            if found:
+                return found
+    m = RELATIVE.search(text)
+    if m:
+        return today + timedelta(days=RELATIVE_DAYS[m.group(1)])
+    m = WEEKDAY.search(text)
+    if m:
+        back = (today.weekday() - WEEKDAYS[m.group(2)]) % 7
+        if m.group(1) and back == 0:
+            back = 7 # "last monday" on a Monday means a week ago
+        return today - timedelta(days=back)
+    return None
+
+
+def needs_fallback(text):
+    """Whether dateutil could find anything match_date didn't (a month name or a date-shaped token).
+
+    A plain number is an amount: dateutil would read "spent 200" as the year 200.
+    """
+    return bool(MONTH_WORD.search(text) or DATE_SHAPED.search(text))
+
+
+def strip_amount(text):
+    """Removes the amount (the first number not part of a date) before dateutil sees the text."""
+    dates = [m.span() for m in DATE_SHAPED.finditer(text)]
+    for m in AMOUNT.finditer(text):
+        if not any(start < m.end() and m.start() < end for start, end in dates):
+            return text[:m.start()] + text[m.end():]
+    return text
+
+
+def extract_date(text):
+    """Extracts a date from the text, trying specific formats and common phrases first, then dateutil."""
+    if not text:
+        now = datetime.now()
+        print("Received empty or None text for date extraction. Defaulting to today.")
+        return now.strftime('%Y-%m-%d'), now.month, now.year
+
+    # Try specific regex first for formats like YYYY-MM-DD, YYYY-M-D etc.
+    # This regex handles YYYY-MM-DD, YYYY-M-D, YYYY/MM/DD, YYYY/M/D
+    match = ISO_DATE.search(text)
+    try:
+        if match:
+            year, month, day = map(int, match.groups())
+            parsed_date = datetime(year, month, day)
+            print(f"Extracted Date (Regex): {parsed_date.strftime('%Y-%m-%d')} from Input: '{text}'")
+            return parsed_date.strftime('%Y-%m-%d'), parsed_date.month, parsed_date.year
+        else:
+            # Common phrases ("15th April", "yesterday", "15/04", "last monday") without dateutil
+            lowered = text.lower()
+            fast_date = match_date(lowered)
+            if fast_date is not None:
+                print(f"Extracted Date (fast path): {fast_date.strftime('%Y-%m-%d')} from Input: '{text}'")
+                return fast_date.strftime('%Y-%m-%d'), fast_date.month, fast_date.year
+            if not needs_fallback(lowered):
+                # No month name or date-shaped token, so dateutil would only return
+                # its default or read the amount as a year
+                now = datetime.now()
+                print(f"No date found in Input: '{text}'. Using today.")
+                return now.strftime('%Y-%m-%d'), now.month, now.year
+            # Fallback to dateutil.parser for more complex phrases
+            # Use fuzzy=True carefully, might misinterpret numbers. dayfirst=True is region-dependent.
+            # Set default to now() to handle cases where no date is found
+            # Add a check for empty string before parsing
+            text = strip_amount(text) # "add 50 for food in april" is April this year, not 2050
+            if text.strip():
+                parsed_date = parse(text, fuzzy=True, default=datetime.now(), dayfirst=True)
+                # Check if parse actually found a date different from default within the string
+                # This is tricky, as fuzzy might find *something*. A better check might be needed.
+                # Heuristic: If the parsed date is today AND 'today' isn't in the text, it might be a default fallback
+                is_default_date = (parsed_date.date() == datetime.now().date() and
+                                   'today' not in lowered and
+                                   not PARTIAL_DATE.search(text) and # No obvious partial date
+                                   not YESTERDAY_TOMORROW.search(lowered)) # No relative terms
+
+                if is_default_date and match is None: # Double check it wasn't the regex match case
+                     now = datetime.now()
+                     print(f"Date Parsing (dateutil) likely defaulted for Input: '{text}'. Using today.")
+                     return now.strftime('%Y-%m-%d'), now.month, now.year
+                else:
+                    print(f"Extracted Date (dateutil): {parsed_date.strftime('%Y-%m-%d')} from Input: '{text}'")
+                    return parsed_date.strftime('%Y-%m-%d'), parsed_date.month, parsed_date.year
+            else:
+                 now = datetime.now()
+                 print("Input text is empty after stripping for dateutil parsing. Defaulting to today.")
+                 return now.strftime('%Y-%m-%d'), now.month, now.year
+
+    except (ValueError, OverflowError, TypeError) as e:
+        # If any parsing fails, default to now
+        now = datetime.now()
+        print(f"Date Parsing Failed for Input: '{text}'. Error: {e}. Defaulting to today.")
+        return now.strftime('%Y-%m-%d'), now.month, now.year
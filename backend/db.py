@@ -0,0 +1,277 @@
+"""SQLite connection management for the chat backend (backend2.py).
+
+Each Flask request borrows its own connection from a bounded pool instead of
+sharing one global cursor across threads. The database runs in WAL mode, so
+readers keep reading while a writer commits.
+"""
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Applied to every new connection. journal_mode=WAL is stored in the database
+# file; the others are per connection.
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # FULL syncs the WAL on every commit, so an acknowledged write survives a
+    # power failure. NORMAL skips that sync: still no corruption in WAL mode
+    # and much cheaper commits, but a power failure can drop the last commits.
+    "synchronous": "FULL",
+    "cache_size": -16000, # KiB, i.e. ~16MB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000, # ms to wait on a locked database before SQLITE_BUSY
+}
+
+
+def connect(path, pragmas=PRAGMAS):
+    """Opens a tuned connection to the database at `path`."""
+    conn = sqlite3.connect(path, timeout=pragmas.get("busy_timeout", 5000) / 1000, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """No pooled connection became free in time."""
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections, created lazily up to `size`."""
+
+    def __init__(self, path, size=8, timeout=10.0, pragmas=PRAGMAS):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._idle = queue.LifoQueue() # LIFO keeps the hottest connections (and caches) in use
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Opens a new, tuned connection (not tracked by the pool)."""
+        return connect(self.path, self.pragmas)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No database connection free after {self.timeout}s (pool size {self.size})")
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback() # Never hand out a connection with someone's half-done work
+        if self._closed:
+            # Pool was closed while this connection was borrowed
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        """Closes the idle connections; borrowed ones are closed when released."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+class UserDatabases:
+    """One SQLite file per user, with a bounded LRU cache of open pools.
+
+    Users never share a file, so their writes never wait on each other's lock.
+    pool(user_id) returns the user's ConnectionPool, opening (and, on first
+    use, creating and migrating) the file if needed. At most `max_open` pools
+    stay open; opening one more closes the least recently used. Files are
+    named after a hash of the user id, so any id is a safe file name.
+    """
+
+    def __init__(self, directory, max_open=256, pool_size=4, migrate=None, pragmas=PRAGMAS):
+        self.directory = directory
+        self.max_open = max_open
+        self.pool_size = pool_size
+        self.pragmas = pragmas
+        self.migrate = migrate # Called with a connection when a file is opened
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, user_id):
+        digest = hashlib.sha256(str(user_id).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"user_{digest}.db")
+
+    def pool(self, user_id):
+        with self._lock:
+            pool = self._pools.get(user_id)
+            if pool is not None:
+                self._pools.move_to_end(user_id)
+                return pool
+        # Open outside the lock so a slow first-time migration doesn't block other users
+        pool = ConnectionPool(self.path(user_id), size=self.pool_size, pragmas=self.pragmas)
+        if self.migrate is not None:
+            conn = pool.acquire()
+            try:
+                self.migrate(conn)
+            finally:
+                pool.release(conn)
+        evict = []
+        with self._lock:
+            existing = self._pools.get(user_id)
+            if existing is not None:
+                # Another thread opened it meanwhile; keep theirs
+                self._pools.move_to_end(user_id)
+                evict.append(pool)
+                pool = existing
+            else:
+                self._pools[user_id] = pool
+                self.opened += 1
+                while len(self._pools) > self.max_open:
+                    evict.append(self._pools.popitem(last=False)[1])
+                    self.evicted += 1
+        for cold in evict:
+            cold.close()
+        return pool
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._pools), "max_open": self.max_open,
+                    "opened": self.opened, "evicted": self.evicted}
+
+
+class _PendingWrite:
+    __slots__ = ("sql", "params", "done", "rowid", "error")
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event()
+        self.rowid = None
+        self.error = None
+
+
+class GroupCommitWriter:
+    """Funnels single-row writes through one connection and commits them in groups.
+
+    execute() queues a statement and blocks until the transaction containing it
+    has committed. A background thread starts a group with the first queued
+    write and adds everything that queued up meanwhile, i.e. the writes that
+    arrived during the previous commit, up to `max_batch` statements. It can
+    also linger up to `max_delay` seconds for more. Then it commits once, so
+    many writers share one fsync. The writer
+    connection uses synchronous=FULL: a write is acknowledged only once durable.
+    Each statement runs in its own savepoint, so one failing row doesn't sink
+    the rest of its group.
+    """
+
+    def __init__(self, pool, max_batch=64, max_delay=0.0):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._conn = pool.connect()
+        self._conn.isolation_level = None # Transactions are managed explicitly below
+        self._conn.execute("PRAGMA synchronous = FULL")
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def execute(self, sql, params=()):
+        """Runs one write statement; returns its lastrowid once committed, or raises its error."""
+        pending = _PendingWrite(sql, params)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.rowid
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._conn.close()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            # Take everything already queued (writes that arrived during the
+            # previous commit) without waiting, then wait for more only until
+            # the deadline
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                self._queue.put(None) # Finish this group, then stop
+                break
+            group.append(item)
+        return group
+
+    def _run(self):
+        conn = self._conn
+        while True:
+            group = self._collect()
+            if group is None:
+                return
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for pending in group:
+                    conn.execute("SAVEPOINT row")
+                    try:
+                        pending.rowid = conn.execute(pending.sql, pending.params).lastrowid
+                        conn.execute("RELEASE row")
+                    except sqlite3.Error as e:
+                        conn.execute("ROLLBACK TO row")
+                        conn.execute("RELEASE row")
+                        pending.error = e
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                # Nothing in the group was committed
+                for pending in group:
+                    if pending.error is None:
+                        pending.error = e
+            for pending in group:
+                pending.done.set()
@@ -0,0 +1,76 @@
+"""Keyword extraction helpers used by the chat backend (backend2.py)."""
+import re
+
+# --- Category keywords ---
+# Order matters: when a message mentions keywords from several categories the
+# first category listed wins (and within it, the first keyword listed), exactly
+# like the old nested loop. e.g. 'movie' resolves to 'outing', not 'entertainment'.
+CATEGORY_KEYWORDS = {
+    'food': [
+        'food', 'eat', 'snack', 'lunch', 'dinner', 'breakfast', 'cafe', 'restaurant', 'coffee', 'pizza', 'burger', 'meal', 'thali'
+    ],
+    'stationery': [
+        'stationery', 'pen', 'pencil', 'eraser', 'notebook', 'book', 'copy', 'paper', 'files', 'markers', 'highlighter'
+    ],
+    'outing': [
+        'outing', 'movie', 'cinema', 'trip', 'vacation', 'picnic', 'tour', 'hangout', 'resort', 'travel' # Note: 'travel' also here
+    ],
+    'transport': [
+        'transport', 'bus', 'train', 'cab', 'taxi', 'auto', 'ride', 'metro', 'flight', 'fare', 'bike', 'uber', 'ola'
+    ],
+    'fees': [
+        'fees', 'tuition', 'school', 'college', 'exam', 'admission', 'registration', 'course', 'classes', 'coaching'
+    ],
+    'heart': [
+        'heart', 'girlfriend', 'boyfriend', 'partner', 'crush', 'date', 'love', 'darling', 'sweetheart', 'bae', 'him', 'her', 'anniversary', 'valentine'
+    ],
+    'clothing': [
+        'clothes', 'clothing', 'dress', 'shirt', 'tshirt', 'jeans', 'hoodie', 'kurta', 'lehenga', 'suit', 'apparel', 'jacket'
+    ],
+    'groceries': [
+        'grocery', 'groceries', 'vegetables', 'fruits', 'milk', 'bread', 'eggs', 'ration', 'supermarket'
+    ],
+    'entertainment': [
+        'entertainment', 'netflix', 'subscription', 'spotify', 'games', 'game', 'movie', 'fun', 'play', 'music', 'youtube' # Note: 'movie' also here
+    ],
+    'others': []
+}
+
+# A keyword matched with r'\b' + keyword + r'\b' is always a whole \w+ run of the
+# text, so one tokenizing pass plus dict lookups finds the same hits as one regex
+# per keyword, no matter how many keywords there are.
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def build_keyword_index(keyword_map):
+    """Maps each keyword to (priority, category); lower priority wins."""
+    index = {}
+    priority = 0
+    for category, keywords in keyword_map.items():
+        for keyword in keywords:
+            if not keyword or not WORD_PATTERN.fullmatch(keyword):
+                raise ValueError(f"Category keyword must be a single word: {keyword!r}")
+            # Keep the first occurrence so duplicates ('movie') keep their old winner
+            index.setdefault(keyword, (priority, category))
+            priority += 1
+    return index
+
+
+KEYWORD_INDEX = build_keyword_index(CATEGORY_KEYWORDS)
+
+
+def match_category(text, index=KEYWORD_INDEX):
+    """Finds the winning category keyword in one pass over the text.
+
+    Returns (category, keyword), or ('others', None) when no keyword matches.
+    """
+    best = None
+    if text:
+        for token in WORD_PATTERN.findall(text.lower()):
+            hit = index.get(token)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = (hit[0], hit[1], token)
+    if best is None:
+        return 'others', None
+    return best[1], best[2]
+
@@ -0,0 +1,80 @@
+"""Parse-once message preprocessing for the chat backend (backend2.py).
+
+MessageFeatures(text) scans a message once and keeps what the rule router, the
+intent handlers and the classifier read from it: the lowercased text and its
+words, the amount, month and year tokens, whether it contains a date phrase,
+and (computed on first use, then kept) the category and the date. Before, each
+of those steps lowercased and rescanned the text.
+"""
+import calendar
+import re
+from functools import cached_property
+
+from dates import extract_date
+from extractors import match_category
+
+AMOUNT_PATTERN = re.compile(r'\b\d+(\.\d{1,2})?\b')
+YEAR_PATTERN = re.compile(r'\b(20\d{2})\b') # Matches years like 2023, 2024
+# Patterns indicating show_by_date: 'on DD/MM/YYYY', 'for YYYY-MM-DD', 'summary YYYY/MM/DD'
+DATE_PHRASE_PATTERN = re.compile(
+    r'\b(on|for|summary)\s+(\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})\b')
+# Month patterns -> show_by_month: 'summary for april', 'show june expenses', 'income in 2024 july'
+MONTH_NAME_PATTERN = re.compile(
+    r'\b(january|february|march|april|may|june|july|august|september|october|november|december'
+    r'|jan|feb|mar|apr|jun|jul|aug|sep|oct|nov|dec)\b')
+OTHERS_PATTERN = re.compile(r'\bothers\b')
+# Rule words for show_insights / show_breakdown, as whole words: "add 300 for
+# month end party" or "paid 800 for bike breakdown repair" is an expense
+INSIGHTS_PATTERN = re.compile(
+    r'\b(insights?|forecasts?|projected|projections?|overspend(s|ing)?|month[- ]end)\b')
+BREAKDOWN_PATTERN = re.compile(r'\b(breakdown|spending (pattern|trend)s?)\b')
+READ_VERB_PATTERN = re.compile(r'\b(show|what|how|view|see|give|tell|display|list)\b')
+
+MONTH_NUMBERS = {name.lower(): num for num, name in enumerate(calendar.month_name) if num}
+MONTH_NUMBERS.update({name.lower(): num for num, name in enumerate(calendar.month_abbr) if num})
+
+
+class MessageFeatures:
+    """Everything the router, handlers and classifier need from one message."""
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.words = self.lower.split()
+        match = AMOUNT_PATTERN.search(text)
+        self.amount = float(match.group()) if match else None
+        # First whole word naming a month ("april", "apr"), as a number
+        self.month = next((MONTH_NUMBERS[word] for word in self.words if word in MONTH_NUMBERS), None)
+        match = YEAR_PATTERN.search(text)
+        self.year = int(match.group(1)) if match else None
+        self.has_date_phrase = DATE_PHRASE_PATTERN.search(self.lower) is not None
+        self.has_month_name = MONTH_NAME_PATTERN.search(self.lower) is not None
+        self.mentions_others = OTHERS_PATTERN.search(self.lower) is not None
+        self.mentions_insights = INSIGHTS_PATTERN.search(self.lower) is not None
+        self.mentions_breakdown = BREAKDOWN_PATTERN.search(self.lower) is not None
+        # Reads as a question rather than a record: no amount other than a year,
+        # or a show/what/how-style verb ("how much will I overspend by 500")
+        self.asks = (self.amount is None or self.amount == self.year
+                     or READ_VERB_PATTERN.search(self.lower) is not None)
+
+    @cached_property
+    def category_match(self):
+        """(category, keyword) from the keyword index, ('others', None) if no keyword matched."""
+        return match_category(self.lower)
+
+    @property
+    def category(self):
+        return self.category_match[0]
+
+    @cached_property
+    def date(self):
+        """(YYYY-MM-DD, month, year) the message refers to, today if it names none."""
+        return extract_date(self.text)
+
+    def contains(self, *phrases):
+        """Whether any of the phrases occurs in the lowercased text (substring match)."""
+        return any(phrase in self.lower for phrase in phrases)
+
+    def __repr__(self):
+        return (f"MessageFeatures(amount={self.amount}, month={self.month}, year={self.year}, "
+                f"date_phrase={self.has_date_phrase}, month_name={self.has_month_name})")
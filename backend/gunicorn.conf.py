@@ -0,0 +1,28 @@
+# Pre-forked serving for backend2.py. Run from the backend folder:
+#   gunicorn -c gunicorn.conf.py backend2:app
+# Workers load the model in mmap mode, so the vocabulary and coefficient arrays
+# live once in the page cache and every worker maps the same read-only pages.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compact_model import unpack_mmap_dir, warm_page_cache
+
+# Keep in sync with COMPACT_MODEL_PATH / MMAP_MODEL_DIR in backend2.py
+COMPACT_MODEL_PATH = '/home/kali/AI_Project/chat_botcode/vectorized_set/intent_model_v3.npz'
+MMAP_MODEL_DIR = os.path.splitext(COMPACT_MODEL_PATH)[0]
+
+bind = "0.0.0.0:5000"
+workers = int(os.environ.get("FUNDMATE_WORKERS", "4"))
+# backend2 opens its SQLite connection at import time and connections must not
+# cross a fork, so the app is imported in each worker rather than the master.
+preload_app = False
+raw_env = ["FUNDMATE_MODEL_FORMAT=mmap"]
+
+
+def on_starting(server):
+    """Pre-fork hook: unpack the model once in the master and pull it into the page cache."""
+    directory = unpack_mmap_dir(COMPACT_MODEL_PATH, MMAP_MODEL_DIR)
+    warm_page_cache(directory)
+    server.log.info(f"Model arrays ready for mmap in {directory}")
@@ -0,0 +1,200 @@
+"""Streaming bulk import of CSV ledgers / bank statements into fund_manager.db.
+
+Rows are read one at a time from the file and inserted with executemany() in
+chunked transactions, so memory stays flat however large the file is. Columns
+are mapped by header name; when there is no category column the category is
+guessed from a description column with the chat keyword matcher.
+
+    python importer.py statement.csv --db /path/to/fund_manager.db \\
+        --date-col Date --debit-col Withdrawal --credit-col Deposit --description-col Narration
+"""
+import argparse
+import csv
+import re
+import time
+from datetime import datetime
+
+from dateutil.parser import parse
+
+from extractors import match_category
+from ledger import EXPENSE_INSERT, INCOME_INSERT, expense_row, income_row
+
+# Formats tried before falling back to dateutil (much slower per row)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%b-%Y', '%d %b %Y', '%Y/%m/%d')
+
+# The number in an amount cell, thousands separators included; currency
+# prefixes such as 'Rs.' or '₹' around it are ignored
+_AMOUNT = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+
+class ColumnMapping:
+    """Which CSV header holds which field.
+
+    Give either `amount` (with `kind` 'expense', 'income', or 'auto' where
+    negative amounts are expenses) or `debit`/`credit` columns as in bank
+    statements. `category` is optional; without it the category is matched
+    from `description` (or the whole row).
+    """
+
+    def __init__(self, date='date', amount='amount', debit=None, credit=None, category=None,
+                 description=None, kind='expense'):
+        if kind not in ('expense', 'income', 'auto'):
+            raise ValueError(f"kind must be 'expense', 'income' or 'auto', got {kind!r}")
+        self.date = date
+        self.amount = amount
+        self.debit = debit
+        self.credit = credit
+        self.category = category
+        self.description = description
+        self.kind = kind
+
+
+def parse_amount(value):
+    """'₹1,250.50' -> 1250.5, 'Rs. 500' -> 500.0; blank -> None.
+
+    A minus sign before the number ('-500', '₹-500', '-Rs 500'), after it
+    ('500-'), or accounting parentheses ('(1,200.00)') make it negative.
+    """
+    value = (value or '').strip()
+    match = _AMOUNT.search(value)
+    if match is None:
+        return None
+    amount = float(match.group().replace(',', ''))
+    negative = ('-' in value[:match.start()] or value[match.end():].lstrip().startswith('-')
+                or (value.startswith('(') and value.endswith(')')))
+    return -amount if negative else amount
+
+
+_date_cache = {}
+
+
+def parse_date(value):
+    """Parses a statement date; caches results since statements repeat dates a lot."""
+    value = value.strip()
+    parsed = _date_cache.get(value)
+    if parsed is None:
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            parsed = parse(value, dayfirst=True).date()
+        if len(_date_cache) < 10000:
+            _date_cache[value] = parsed
+    return parsed
+
+
+def map_row(row, mapping):
+    """Turns one CSV row into ('expense' | 'income', params) for the INSERT."""
+    day = parse_date(row[mapping.date])
+    if mapping.debit or mapping.credit:
+        debit = parse_amount(row.get(mapping.debit)) if mapping.debit else None
+        credit = parse_amount(row.get(mapping.credit)) if mapping.credit else None
+        if debit:
+            kind, amount = 'expense', abs(debit)
+        elif credit:
+            kind, amount = 'income', abs(credit)
+        else:
+            raise ValueError("no debit or credit amount")
+    else:
+        amount = parse_amount(row[mapping.amount])
+        if amount is None:
+            raise ValueError("no amount")
+        kind = mapping.kind
+        if kind == 'auto':
+            kind = 'expense' if amount < 0 else 'income'
+        amount = abs(amount)
+
+    if kind == 'income':
+        return kind, income_row(day, amount)
+    category = (row.get(mapping.category) or '').strip().lower() if mapping.category else ''
+    if not category:
+        text = row.get(mapping.description, '') if mapping.description else ' '.join(v for v in row.values() if v)
+        category, _ = match_category(text)
+    return kind, expense_row(day, category, amount)
+
+
+def import_csv(conn, lines, mapping, chunk_size=5000, progress=None, progress_every=100000):
+    """Streams rows from `lines` (an open text file or iterable of CSV lines) into the ledger.
+
+    Each chunk of `chunk_size` rows is inserted and committed as one
+    transaction. Rows that can't be parsed are skipped and counted.
+    `progress(stats)` is called every `progress_every` rows. Returns the stats dict.
+    """
+    stats = {'rows': 0, 'expenses': 0, 'income': 0, 'skipped': 0, 'errors': [], 'seconds': 0.0}
+    start = time.perf_counter()
+    expenses, income = [], []
+
+    def flush():
+        with conn: # one transaction per chunk
+            if expenses:
+                conn.executemany(EXPENSE_INSERT, expenses)
+            if income:
+                conn.executemany(INCOME_INSERT, income)
+        stats['expenses'] += len(expenses)
+        stats['income'] += len(income)
+        expenses.clear()
+        income.clear()
+
+    for line_no, row in enumerate(csv.DictReader(lines), start=2):
+        stats['rows'] += 1
+        try:
+            kind, params = map_row(row, mapping)
+        except (KeyError, ValueError, OverflowError, TypeError) as e:
+            stats['skipped'] += 1
+            if len(stats['errors']) < 20: # Keep a sample, not one message per bad row
+                stats['errors'].append(f"line {line_no}: {e}")
+            continue
+        (income if kind == 'income' else expenses).append(params)
+        if len(expenses) + len(income) >= chunk_size:
+            flush()
+        if progress and stats['rows'] % progress_every == 0:
+            stats['seconds'] = time.perf_counter() - start
+            progress(stats)
+    flush()
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = round(stats['rows'] / stats['seconds']) if stats['seconds'] else 0
+    return stats
+
+
+def print_progress(stats):
+    rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"  {stats['rows']:,} rows ({rate:,.0f} rows/s, {stats['skipped']} skipped)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import a CSV ledger into fund_manager.db")
+    parser.add_argument('csv_path')
+    parser.add_argument('--db', required=True, help="path to fund_manager.db")
+    parser.add_argument('--kind', default='expense', choices=('expense', 'income', 'auto'),
+                        help="what rows of a single amount column are ('auto': negative = expense)")
+    parser.add_argument('--date-col', default='date')
+    parser.add_argument('--amount-col', default='amount')
+    parser.add_argument('--debit-col')
+    parser.add_argument('--credit-col')
+    parser.add_argument('--category-col')
+    parser.add_argument('--description-col')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    from db import ConnectionPool
+    from migrations import migrate
+
+    mapping = ColumnMapping(date=args.date_col, amount=args.amount_col, debit=args.debit_col,
+                            credit=args.credit_col, category=args.category_col,
+                            description=args.description_col, kind=args.kind)
+    conn = ConnectionPool(args.db).connect()
+    migrate(conn)
+    with open(args.csv_path, newline='', encoding='utf-8-sig') as f:
+        stats = import_csv(conn, f, mapping, chunk_size=args.chunk_size, progress=print_progress)
+    conn.close()
+    print(f"Imported {stats['expenses']:,} expenses and {stats['income']:,} income rows "
+          f"({stats['skipped']} skipped) in {stats['seconds']:.1f}s, {stats['rows_per_second']:,} rows/s")
+    for error in stats['errors']:
+        print(f"  skipped {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+"""Inference helpers for the chat backend (backend2.py)."""
+import gc
+import multiprocessing
+import queue
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Merges concurrent single-message predictions into batched calls.
+
+    Request threads call predict(text) and block. A background thread takes the
+    first queued message, keeps collecting until `max_wait` seconds have passed
+    or `max_batch_size` messages are waiting, then runs `predict_batch` once
+    (one vectorizer transform + one model predict) and hands each caller its
+    own result.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait=0.005):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="intent-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, text):
+        """Queues one message and waits for its prediction."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def close(self):
+        """Stops the background thread after the queued messages are served."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what we have, then let _run see the stop marker
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                results = self.predict_batch([text for text, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                print(f"Error in batched intent prediction for {len(batch)} inputs: {e}")
+                traceback.print_exc()
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+class WorkerDied(RuntimeError):
+    """A pool worker crashed or hung while serving a call (it is replaced in the background), or none was free in time."""
+
+
+def _worker_main(fn, reload_fn, conn, parent_conn):
+    """Worker process loop: answer pings, run reload_fn on reloads and fn on each call's argument."""
+    parent_conn.close() # Else our own copy of the parent's end would hide its exit from recv()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return # Parent went away
+        if message is None:
+            return
+        kind, arg = message
+        if kind == "ping":
+            conn.send(("pong", None))
+            continue
+        try:
+            conn.send(("ok", reload_fn(arg) if kind == "reload" else fn(arg)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, context, fn, reload_fn, generation):
+        self.generation = generation # The pool's reload count this worker is up to date with
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(fn, reload_fn, child_conn, self.conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ForkedWorkerPool:
+    """Runs fn(arg) in pre-forked worker processes, outside this process's GIL.
+
+    Workers are forked from the parent after the model is loaded, so they
+    share its arrays copy-on-write instead of loading their own copy;
+    gc.freeze() first keeps the garbage collector from touching (and so
+    copying) those pages. Create the pool before the process starts any other
+    threads: a child forked while another thread holds a lock (stdout, the
+    allocator, SQLite) inherits that lock held forever.
+
+    call(arg) borrows an idle worker, sends it arg over a pipe and waits up to
+    `timeout` seconds for the answer. If the worker is found dead, dies or
+    hangs mid-call, or no worker is free within `timeout`, the caller gets
+    WorkerDied (and can do the work itself); request threads never fork.
+    Failed workers are killed and re-forked by the health thread, which also
+    pings idle workers every `health_interval` seconds and replaces any that
+    stopped answering. Those replacements are the only forks after start-up,
+    so they still happen while the parent runs other threads; the health
+    thread holds no locks of its own while forking.
+
+    reload(arg) has every worker run reload_fn(arg) in place (e.g. load a new
+    model version) instead of re-forking it. The health thread reloads idle
+    workers one at a time, so until it reaches a worker, calls may still be
+    answered by it on the old state; fn has to tell such answers apart. A
+    reloaded worker holds its own copy of whatever reload_fn loads, no longer
+    shared with the parent (memory-mapped files are still shared through the
+    page cache). A worker whose reload fails is replaced by a fresh fork.
+
+    fn and reload_fn must be reachable from the forked child (module-level
+    functions or ones closing over already-loaded state), and args/results
+    must pickle.
+    """
+
+    def __init__(self, fn, workers=2, timeout=10.0, health_interval=5.0, reload_fn=None, reload_timeout=120.0):
+        self.fn = fn
+        self.reload_fn = reload_fn
+        self.size = workers
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.reload_timeout = reload_timeout
+        self.calls = 0
+        self.restarts = 0
+        self.reloads = 0
+        self.generation = 0 # Bumped by each reload()
+        self._reload_arg = None
+        self._failed = 0 # Workers retired and not yet replaced
+        self._context = multiprocessing.get_context("fork")
+        self._idle = queue.Queue() # FIFO, so the health check rotates through all workers
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._wake = threading.Event() # Wakes the health thread early: a worker failed or a reload is due
+        gc.freeze() # Move everything loaded so far out of the collector's reach
+        for _ in range(workers):
+            self._idle.put(self._fork(0))
+        self._health = threading.Thread(target=self._check_health, name="worker-pool-health", daemon=True)
+        self._health.start()
+
+    def call(self, arg):
+        """Runs fn(arg) in a worker and returns its result. Raises WorkerDied if no worker could."""
+        if self._closed.is_set():
+            raise RuntimeError("ForkedWorkerPool is closed")
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise WorkerDied(f"No worker was free within {self.timeout}s") from None
+        try:
+            if not worker.process.is_alive():
+                raise EOFError(f"worker {worker.process.pid} exited with code {worker.process.exitcode}")
+            worker.conn.send(("call", arg))
+            if not worker.conn.poll(self.timeout):
+                raise TimeoutError(f"worker {worker.process.pid} did not answer within {self.timeout}s")
+            kind, result = worker.conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            self._retire(worker)
+            raise WorkerDied(f"Classifier worker failed: {e}") from e
+        self._idle.put(worker)
+        with self._lock:
+            self.calls += 1
+        if kind == "error":
+            raise RuntimeError(f"Error in classifier worker: {result}")
+        return result
+
+    def reload(self, arg):
+        """Has every worker run reload_fn(arg), e.g. after the parent reloaded its model. Returns at once."""
+        with self._lock:
+            self.generation += 1
+            self._reload_arg = arg
+        self._wake.set()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._health.join()
+        with self._lock:
+            live = self.size - self._failed
+        for _ in range(live):
+            try:
+                self._idle.get(timeout=self.timeout).stop()
+            except queue.Empty:
+                break # Its call failed meanwhile, and it was already killed
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.size, "idle": self._idle.qsize(), "failed": self._failed,
+                    "calls": self.calls, "restarts": self.restarts, "reloads": self.reloads,
+                    "generation": self.generation}
+
+    def _fork(self, generation):
+        return _Worker(self._context, self.fn, self.reload_fn, generation)
+
+    def _retire(self, worker):
+        """Kills a failed worker and leaves its replacement to the health thread."""
+        print(f"Classifier worker {worker.process.pid} failed (exit code {worker.process.exitcode}); "
+              "it will be replaced")
+        worker.kill()
+        with self._lock:
+            self._failed += 1
+        self._wake.set()
+
+    def _replace_failed(self):
+        with self._lock:
+            failed, generation = self._failed, self.generation
+        for _ in range(failed):
+            try:
+                worker = self._fork(generation) # Forked from the parent's current state, so up to date
+            except OSError as e:
+                print(f"Could not fork a classifier worker, retrying later: {e}")
+                return
+            with self._lock:
+                self._failed -= 1
+                self.restarts += 1
+            self._idle.put(worker)
+
+    def _refresh(self, worker):
+        """Reloads the worker if it predates the last reload(), else pings it. Returns whether it answered."""
+        with self._lock:
+            generation, arg = self.generation, self._reload_arg
+        stale = worker.generation != generation
+        try:
+            worker.conn.send(("reload", arg) if stale else ("ping", None))
+            if not worker.conn.poll(self.reload_timeout if stale else self.timeout):
+                return False
+            kind, result = worker.conn.recv()
+        except (EOFError, OSError):
+            return False
+        if stale:
+            if kind != "ok":
+                print(f"Classifier worker {worker.process.pid} could not reload: {result}")
+                return False
+            worker.generation = generation
+            with self._lock:
+                self.reloads += 1
+        return kind in ("ok", "pong")
+
+    def _check_health(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.health_interval)
+            self._wake.clear()
+            if self._closed.is_set():
+                return
+            self._replace_failed()
+            reloaded = False
+            # Check as many workers as there are, one borrowed at a time, so
+            # live traffic keeps the rest
+            for _ in range(self.size):
+                try:
+                    worker = self._idle.get(timeout=self.health_interval)
+                except queue.Empty:
+                    break # All busy, so evidently working
+                stale = worker.generation != self.generation
+                if worker.process.is_alive() and self._refresh(worker):
+                    self._idle.put(worker)
+                    reloaded = reloaded or stale
+                else:
+                    self._retire(worker)
+            self._replace_failed()
+            if reloaded:
+                self._wake.set() # Go round again at once for the workers that were busy
+
+
+_WHITESPACE = re.compile(r'\s+')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def normalize_message(text, mask_numbers=False):
+    """Cache key for a message: case and whitespace folded, numbers optionally masked.
+
+    "Spent  450 on food" and "spent 90 on food" share a key when numbers are
+    masked. Only mask them for a classifier that ignores numbers: the TF-IDF
+    model has numeric tokens, and "sold my bike accessories for 800 rupees"
+    vs. "... for 20 rupees" gets a different intent.
+    """
+    key = _WHITESPACE.sub(' ', text.strip().lower())
+    if mask_numbers:
+        key = _NUMBER.sub('0', key)
+    return key
+
+
+class IntentCache:
+    """Thread-safe bounded LRU cache of intent predictions keyed on normalized text."""
+
+    def __init__(self, maxsize=1024, mask_numbers=False):
+        self.maxsize = maxsize
+        self.mask_numbers = mask_numbers
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text):
+        return normalize_message(text, self.mask_numbers)
+
+    def get(self, text):
+        """Returns the cached intent for text, or None."""
+        key = self.key(text)
+        with self._lock:
+            intent = self._entries.get(key)
+            if intent is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return intent
+
+    def put(self, text, intent):
+        if self.maxsize <= 0:
+            return
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = intent
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every entry, e.g. after a model reload. The counters keep running."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
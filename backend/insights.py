@@ -0,0 +1,277 @@
+"""Precomputed spending insights and forecasts for the chat backend (backend2.py).
+
+compute_insights() works out, for the current month of one ledger:
+
+    the balance, what was spent and earned so far, the usual month (average
+    over those of the BASELINE_MONTHS previous months that have rows, not
+    counting the ledger's partly covered first month), a month-end forecast
+    of expenses, income and balance, and the categories running ahead of
+    their usual pace ("you're overspending on heart this month")
+
+It reads the rollup tables plus one range over the day index, so its cost
+depends on a few months of rows, not the whole ledger. The result is stored in
+the ledger's own `insights` table (migration 5), so the chat intent serves it
+with a primary-key lookup and never computes in the request path.
+
+InsightsScheduler keeps the stored rows current from a background thread,
+recomputing only ledgers that changed. It can also be run by hand (or from
+cron, as a companion worker to backends running with the scheduler off):
+
+    python insights.py /path/to/fund_manager.db [more.db ...]
+"""
+import calendar
+import json
+import sys
+import threading
+import time
+import traceback
+from datetime import date, datetime
+
+from analytics import month_index, month_label
+from db import connect
+from ledger import day_date, day_number, from_paise
+
+BASELINE_MONTHS = 3 # Previous months averaged into "a usual month"
+# A category is flagged once its spend this month is this many times what a
+# usual month has spent by the same day, and at least OVERSPEND_MIN_PAISE over it.
+# Only categories with rows in OVERSPEND_MIN_MONTHS of the usual months (or all
+# of them, if fewer) have a usual pace to run ahead of.
+OVERSPEND_RATIO = 1.25
+OVERSPEND_MIN_PAISE = 10000
+OVERSPEND_MIN_MONTHS = 2
+MAX_OVERSPENDING = 5
+
+
+def _month_days(index):
+    """(first day number, last day number) of a month index."""
+    first = date(1970 + index // 12, index % 12 + 1, 1)
+    last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    return day_number(first), day_number(last)
+
+
+def watermark(conn):
+    """A string that changes whenever rows are added to, removed from or rewritten in the ledger."""
+    totals = conn.execute("SELECT kind, total, row_count FROM rollup_totals ORDER BY kind").fetchall()
+    last_ids = [conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                for table in ('expenses', 'income')]
+    rewrites = conn.execute("SELECT count FROM ledger_rewrites WHERE id = 1").fetchone()[0]
+    return ";".join(f"{kind}:{total}:{count}" for kind, total, count in totals) + \
+        ";ids:" + ":".join(map(str, last_ids)) + f";rewrites:{rewrites}"
+
+
+def compute_insights(conn, today=None):
+    """This month's insights and month-end forecast for the ledger on conn, amounts in rupees."""
+    today = today or date.today()
+    current = month_index(today.year, today.month)
+    start, end = _month_days(current)
+    days = end - start + 1
+    elapsed = today.day
+
+    totals = dict(conn.execute("SELECT kind, total FROM rollup_totals"))
+    balance = totals.get('income', 0) - totals.get('expense', 0)
+
+    # The usual month averages the previous months the ledger covers in full
+    # (its first month only if that starts on the 1st) and has rows in, so a
+    # month the app wasn't used doesn't pass for a month without spending
+    firsts = [conn.execute(f"SELECT MIN(day) FROM {table}").fetchone()[0] for table in ('expenses', 'income')]
+    firsts = [first for first in firsts if first is not None]
+    oldest = day_date(min(firsts)) if firsts else today
+    window_start = max(current - BASELINE_MONTHS, month_index(oldest.year, oldest.month) + (oldest.day > 1))
+
+    monthly = {}
+    months_with_rows = set()
+    for kind, year, month, total in conn.execute("SELECT kind, year, month, total FROM rollup_month"):
+        index = month_index(year, month)
+        if index == current or window_start <= index < current:
+            monthly[kind, index == current] = monthly.get((kind, index == current), 0) + total
+            if index < current:
+                months_with_rows.add(index)
+    history = len(months_with_rows) # 0 for a new ledger
+    spent, earned = monthly.get(('expense', True), 0), monthly.get(('income', True), 0)
+
+    baseline_start = _month_days(window_start)[0] if history else start
+    by_category = conn.execute(
+        """SELECT COALESCE(category, 'others'), SUM(CASE WHEN day >= ? THEN paise ELSE 0 END),
+                  SUM(CASE WHEN day < ? THEN paise ELSE 0 END),
+                  COUNT(DISTINCT CASE WHEN day < ? THEN year * 12 + month END)
+           FROM expenses WHERE day BETWEEN ? AND ? GROUP BY 1""",
+        (start, start, start, baseline_start, end)).fetchall()
+
+    if history:
+        usual_expenses = monthly.get(('expense', False), 0) / history
+        usual_income = monthly.get(('income', False), 0) / history
+        # The pace so far, leaning on the usual pace early in the month when
+        # a single purchase would otherwise dominate
+        weight = elapsed / days
+        daily = weight * spent / elapsed + (1 - weight) * usual_expenses / days
+        projected_income = max(earned, round(usual_income))
+    else:
+        usual_expenses = usual_income = None
+        daily = spent / elapsed
+        projected_income = earned
+    projected_expenses = spent + round(daily * (days - elapsed))
+    projected_balance = balance + (projected_income - earned) - (projected_expenses - spent)
+
+    overspending = []
+    if history:
+        for category, so_far, before, months in by_category:
+            if before <= 0 or months < min(OVERSPEND_MIN_MONTHS, history):
+                continue # No usual spend to compare with, or just a one-off
+            usual = before / history
+            expected = usual * elapsed / days
+            if so_far > expected * OVERSPEND_RATIO and so_far - expected >= OVERSPEND_MIN_PAISE:
+                overspending.append({"category": category, "spent": from_paise(so_far),
+                                     "usual": from_paise(round(usual)), "expected_by_now": from_paise(round(expected)),
+                                     "excess": so_far - expected})
+        overspending.sort(key=lambda entry: -entry["excess"])
+        for entry in overspending:
+            entry["excess"] = from_paise(round(entry["excess"]))
+
+    return {
+        "as_of": today.isoformat(),
+        "month": month_label(current),
+        "days_elapsed": elapsed,
+        "days_in_month": days,
+        "baseline_months": history,
+        "balance": from_paise(balance),
+        "spent_so_far": from_paise(spent),
+        "earned_so_far": from_paise(earned),
+        "usual_expenses": from_paise(round(usual_expenses)) if history else None,
+        "usual_income": from_paise(round(usual_income)) if history else None,
+        "projected_expenses": from_paise(projected_expenses),
+        "projected_income": from_paise(projected_income),
+        "projected_balance": from_paise(projected_balance),
+        "overspending": overspending[:MAX_OVERSPENDING],
+    }
+
+
+def load_insights(conn):
+    """The stored insights (with "computed_at"), or None if none were computed yet."""
+    row = conn.execute("SELECT computed_at, payload FROM insights WHERE id = 1").fetchone()
+    if row is None:
+        return None
+    return {**json.loads(row[1]), "computed_at": row[0]}
+
+
+def refresh_insights(conn, today=None, force=False):
+    """Recomputes and stores the ledger's insights if its rows or the date changed. Returns whether it did."""
+    today = today or date.today()
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN") # Watermark and insights from the same snapshot
+    try:
+        mark = watermark(conn)
+        stored = conn.execute("SELECT as_of, watermark FROM insights WHERE id = 1").fetchone()
+        fresh = stored == (day_number(today), mark)
+        payload = None if fresh and not force else compute_insights(conn, today)
+    finally:
+        conn.commit()
+    if payload is None:
+        return False
+    conn.execute("INSERT OR REPLACE INTO insights (id, as_of, watermark, computed_at, payload) VALUES (1, ?, ?, ?, ?)",
+                 (day_number(today), mark, datetime.now().isoformat(timespec="seconds"), json.dumps(payload)))
+    conn.commit()
+    return True
+
+
+class InsightsScheduler:
+    """Keeps every ledger's stored insights current from a background thread.
+
+    mark(path) queues a ledger whose rows changed; every `interval` seconds the
+    thread refreshes the queued ones. At start and then every `sweep_interval`
+    seconds it also checks every ledger `ledgers()` lists, which picks up
+    writes made by other processes and the change of day. A ledger whose
+    watermark and date haven't moved is skipped after a few index lookups.
+    """
+
+    def __init__(self, ledgers, interval=30.0, sweep_interval=900.0, migrate=None):
+        self.ledgers = ledgers # Callable returning the database paths to sweep
+        self.interval = interval
+        self.sweep_interval = sweep_interval
+        self.migrate = migrate # Called with each connection before it is read
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.runs = 0
+        self.sweeps = 0
+        self.refreshed = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.last_run_ms = None
+        self._thread = threading.Thread(target=self._run, name="insights-scheduler", daemon=True)
+        self._thread.start()
+
+    def mark(self, path):
+        with self._lock:
+            self._dirty.add(path)
+
+    def close(self):
+        """Stops the background thread after its current run."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        next_sweep = time.monotonic()
+        while not self._stop.is_set():
+            sweep = time.monotonic() >= next_sweep
+            if sweep:
+                next_sweep = time.monotonic() + self.sweep_interval
+            try:
+                self.run_once(sweep)
+            except Exception as e:
+                print(f"Error in insights run: {e}")
+                traceback.print_exc()
+            self._stop.wait(self.interval)
+
+    def run_once(self, sweep=False):
+        """Refreshes the marked ledgers (all of them when sweeping). Returns how many were recomputed."""
+        with self._lock:
+            paths, self._dirty = self._dirty, set()
+        if sweep:
+            paths.update(self.ledgers())
+            self.sweeps += 1
+        started = time.perf_counter()
+        refreshed = 0
+        for path in sorted(paths):
+            try:
+                if self.refresh(path):
+                    refreshed += 1
+                else:
+                    self.unchanged += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error refreshing insights for {path}: {e}")
+        self.refreshed += refreshed
+        self.runs += 1
+        self.last_run_ms = round((time.perf_counter() - started) * 1000, 1)
+        return refreshed
+
+    def refresh(self, path):
+        conn = connect(path)
+        try:
+            if self.migrate is not None:
+                self.migrate(conn)
+            return refresh_insights(conn)
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._dirty)
+        return {"interval_s": self.interval, "sweep_interval_s": self.sweep_interval, "pending": pending,
+                "runs": self.runs, "sweeps": self.sweeps, "refreshed": self.refreshed,
+                "unchanged": self.unchanged, "errors": self.errors, "last_run_ms": self.last_run_ms}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python insights.py /path/to/fund_manager.db [more.db ...]")
+    from migrations import migrate
+    for db_path in sys.argv[1:]:
+        db = connect(db_path)
+        try:
+            migrate(db)
+            refresh_insights(db, force=True)
+            print(f"{db_path}: {json.dumps(load_insights(db), indent=2)}")
+        finally:
+            db.close()
@@ -0,0 +1,51 @@
+"""Compact ledger encoding used by fund_manager.db from schema version 4.
+
+The expenses and income tables store each date as an integer day number (days
+since 1970-01-01) and each amount as integer paise. Compared to a
+'YYYY-MM-DD' string, REAL amount and redundant month/year columns, rows are
+about half as wide, date ranges compare integers and sums are exact. The
+date, month, year and amount columns still exist as VIRTUAL generated columns
+(computed when read, never stored), so queries can keep selecting them; but
+they can't be written, so inserts go through day and paise:
+
+    conn.execute(EXPENSE_INSERT, expense_row('2025-04-30', 'food', 12.5))
+
+The rollup totals are in paise too; from_paise() turns them back into rupees.
+"""
+from datetime import date
+
+EPOCH = date(1970, 1, 1).toordinal()
+
+EXPENSE_INSERT = "INSERT INTO expenses (day, category, paise) VALUES (?, ?, ?)"
+INCOME_INSERT = "INSERT INTO income (day, paise) VALUES (?, ?)"
+
+
+def day_number(value):
+    """Day number of a datetime.date or a 'YYYY-MM-DD' string (strftime leaves years before 1000 unpadded)."""
+    if isinstance(value, str):
+        value = date(*map(int, value.split('-')))
+    return value.toordinal() - EPOCH
+
+
+def day_date(number):
+    """The datetime.date of a day number."""
+    return date.fromordinal(number + EPOCH)
+
+
+def to_paise(amount):
+    """Rupees (int, float or numeric string) as whole paise, rounded to the nearest."""
+    return round(float(amount) * 100)
+
+
+def from_paise(paise):
+    return paise / 100
+
+
+def expense_row(day, category, amount):
+    """Parameters for EXPENSE_INSERT."""
+    return day_number(day), category, to_paise(amount)
+
+
+def income_row(day, amount):
+    """Parameters for INCOME_INSERT."""
+    return day_number(day), to_paise(amount)
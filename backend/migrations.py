@@ -0,0 +1,327 @@
+"""Versioned schema migrations for fund_manager.db.
+
+The schema version lives in SQLite's `PRAGMA user_version`. Each migration runs
+in its own transaction together with the version bump, so a database is always
+at some known version, even if a migration fails halfway. backend2.py calls
+migrate() at startup; it can also be run by hand:
+
+    python migrations.py /path/to/fund_manager.db
+"""
+import sqlite3
+import sys
+
+from ledger import day_date, day_number
+
+# (version, description, statements). A statement is SQL, or a function called
+# with the connection inside the migration's transaction. Append new
+# migrations; never edit applied ones.
+MIGRATIONS = [
+    (1, "Base expenses and income tables", [
+        """CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            category TEXT,
+            month INTEGER,
+            year INTEGER,
+            amount REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS income (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            time TEXT,
+            month INTEGER,
+            year INTEGER,
+            amount REAL
+        )""",
+    ]),
+    # Covering indexes for the summary handlers: each ends in `amount`, so
+    # SUM(amount) ... WHERE <key> is answered from the index alone.
+    (2, "Covering indexes for month, date and category summaries", [
+        "CREATE INDEX IF NOT EXISTS idx_expenses_year_month ON expenses (year, month, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses (category, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_income_year_month ON income (year, month, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_income_date ON income (date, amount)",
+    ]),
+]
+
+
+
+# --- Rollups (migration 3) ---
+# Running totals kept up to date by triggers, so balance and summary handlers
+# read one row instead of summing the ledger. Each rollup is
+# (table, key columns, key expressions on a ledger row); {row} is NEW or OLD.
+_ROLLUPS = {
+    'expenses': ('expense', [
+        ('rollup_category', ('category',), ('{row}.category',)),
+        ('rollup_month', ('kind', 'year', 'month'), ("'expense'", '{row}.year', '{row}.month')),
+        ('rollup_date', ('kind', 'date'), ("'expense'", '{row}.date')),
+    ]),
+    'income': ('income', [
+        ('rollup_month', ('kind', 'year', 'month'), ("'income'", '{row}.year', '{row}.month')),
+        ('rollup_date', ('kind', 'date'), ("'income'", '{row}.date')),
+    ]),
+}
+
+
+def _rollup_add(kind, rollups, row, amount):
+    statements = [
+        f"""INSERT INTO rollup_totals (kind, total, row_count) VALUES ('{kind}', COALESCE({row}.{amount}, 0), 1)
+            ON CONFLICT(kind) DO UPDATE SET total = total + excluded.total, row_count = row_count + 1"""
+    ]
+    for table, columns, exprs in rollups:
+        exprs = [e.format(row=row) for e in exprs]
+        # Rows with a NULL key can never be asked for, so they aren't rolled up
+        not_null = ' AND '.join(f"{e} IS NOT NULL" for e in exprs if e.startswith(row))
+        statements.append(
+            f"""INSERT INTO {table} ({', '.join(columns)}, total, row_count)
+            SELECT {', '.join(exprs)}, COALESCE({row}.{amount}, 0), 1 WHERE {not_null}
+            ON CONFLICT({', '.join(columns)}) DO UPDATE SET total = total + excluded.total, row_count = row_count + 1""")
+    return statements
+
+
+def _rollup_remove(kind, rollups, row, amount):
+    statements = [
+        f"""UPDATE rollup_totals SET total = total - COALESCE({row}.{amount}, 0), row_count = row_count - 1
+            WHERE kind = '{kind}'"""
+    ]
+    for table, columns, exprs in rollups:
+        match = ' AND '.join(f"{c} = {e.format(row=row)}" for c, e in zip(columns, exprs))
+        statements.append(f"""UPDATE {table} SET total = total - COALESCE({row}.{amount}, 0), row_count = row_count - 1
+            WHERE {match}""")
+        statements.append(f"DELETE FROM {table} WHERE {match} AND row_count <= 0")
+    return statements
+
+
+def _rollup_triggers(ledgers=_ROLLUPS, amount='amount'):
+    triggers = []
+    for ledger, (kind, rollups) in ledgers.items():
+        bodies = {
+            'INSERT': _rollup_add(kind, rollups, 'NEW', amount),
+            'DELETE': _rollup_remove(kind, rollups, 'OLD', amount),
+            'UPDATE': _rollup_remove(kind, rollups, 'OLD', amount) + _rollup_add(kind, rollups, 'NEW', amount),
+        }
+        for event, body in bodies.items():
+            statements = ''.join(f"    {statement};\n" for statement in body)
+            triggers.append(f"CREATE TRIGGER IF NOT EXISTS {ledger}_rollup_{event.lower()} "
+                            f"AFTER {event} ON {ledger} BEGIN\n{statements}END")
+    return triggers
+
+
+MIGRATIONS.append(
+    (3, "Rollup tables for balance, category, month and date totals", [
+        "CREATE TABLE IF NOT EXISTS rollup_totals (kind TEXT PRIMARY KEY, total REAL NOT NULL, row_count INTEGER NOT NULL)",
+        """CREATE TABLE IF NOT EXISTS rollup_category (category TEXT PRIMARY KEY, total REAL NOT NULL,
+            row_count INTEGER NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS rollup_month (kind TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL,
+            total REAL NOT NULL, row_count INTEGER NOT NULL, PRIMARY KEY (kind, year, month))""",
+        """CREATE TABLE IF NOT EXISTS rollup_date (kind TEXT NOT NULL, date TEXT NOT NULL, total REAL NOT NULL,
+            row_count INTEGER NOT NULL, PRIMARY KEY (kind, date))""",
+        # Seed from the rows already in the ledger
+        """INSERT INTO rollup_totals (kind, total, row_count)
+            SELECT 'expense', COALESCE(SUM(amount), 0), COUNT(*) FROM expenses
+            UNION ALL SELECT 'income', COALESCE(SUM(amount), 0), COUNT(*) FROM income""",
+        """INSERT INTO rollup_category (category, total, row_count)
+            SELECT category, COALESCE(SUM(amount), 0), COUNT(*) FROM expenses WHERE category IS NOT NULL GROUP BY category""",
+        """INSERT INTO rollup_month (kind, year, month, total, row_count)
+            SELECT 'expense', year, month, COALESCE(SUM(amount), 0), COUNT(*) FROM expenses
+                WHERE year IS NOT NULL AND month IS NOT NULL GROUP BY year, month
+            UNION ALL SELECT 'income', year, month, COALESCE(SUM(amount), 0), COUNT(*) FROM income
+                WHERE year IS NOT NULL AND month IS NOT NULL GROUP BY year, month""",
+        """INSERT INTO rollup_date (kind, date, total, row_count)
+            SELECT 'expense', date, COALESCE(SUM(amount), 0), COUNT(*) FROM expenses WHERE date IS NOT NULL GROUP BY date
+            UNION ALL SELECT 'income', date, COALESCE(SUM(amount), 0), COUNT(*) FROM income WHERE date IS NOT NULL GROUP BY date""",
+    ] + _rollup_triggers())
+)
+
+
+# --- Compact ledger (migration 4) ---
+# Dates become integer day numbers (days since 1970-01-01) and amounts integer
+# paise (see ledger.py). date, month, year and amount are VIRTUAL generated
+# columns derived from those, so they cost no space but can't be inserted.
+# SQLite can't change a column's type in place, so both tables are rebuilt
+# (keeping ids and the AUTOINCREMENT counter) and the rollups with them, now
+# totalling integer paise and keyed by day.
+_DAY_SECONDS = "day * 86400, 'unixepoch'"
+_DERIVED_COLUMNS = f"""
+            date TEXT GENERATED ALWAYS AS (date({_DAY_SECONDS})) VIRTUAL,
+            month INTEGER GENERATED ALWAYS AS (CAST(strftime('%m', {_DAY_SECONDS}) AS INTEGER)) VIRTUAL,
+            year INTEGER GENERATED ALWAYS AS (CAST(strftime('%Y', {_DAY_SECONDS}) AS INTEGER)) VIRTUAL,
+            amount REAL GENERATED ALWAYS AS (paise / 100.0) VIRTUAL"""
+_COMPACT_LEDGERS = {
+    'expenses': ("category TEXT,", "category,"),
+    'income': ("time TEXT,", "time,"),
+}
+_COMPACT_ROLLUPS = {
+    'expenses': ('expense', [
+        ('rollup_category', ('category',), ('{row}.category',)),
+        ('rollup_month', ('kind', 'year', 'month'), ("'expense'", '{row}.year', '{row}.month')),
+        ('rollup_date', ('kind', 'day'), ("'expense'", '{row}.day')),
+    ]),
+    'income': ('income', [
+        ('rollup_month', ('kind', 'year', 'month'), ("'income'", '{row}.year', '{row}.month')),
+        ('rollup_date', ('kind', 'day'), ("'income'", '{row}.day')),
+    ]),
+}
+
+
+def _check_compactable(conn):
+    """Pads dates SQLite can't read but ledger.py can (e.g. '200-10-17'), then refuses
+    to migrate rows whose date or amount still wouldn't survive the conversion."""
+    for table in _COMPACT_LEDGERS:
+        unreadable = conn.execute(f"SELECT id, date FROM {table} WHERE date IS NOT NULL AND julianday(date) IS NULL")
+        for row_id, value in unreadable.fetchall():
+            try:
+                fixed = day_date(day_number(value)).isoformat()
+            except (ValueError, TypeError, OverflowError):
+                continue
+            conn.execute(f"UPDATE {table} SET date = ? WHERE id = ?", (fixed, row_id))
+        bad = [row[0] for row in conn.execute(
+            f"""SELECT id FROM {table}
+                WHERE (date IS NOT NULL AND julianday(date) IS NULL)
+                   OR (date IS NULL AND (month IS NOT NULL OR year IS NOT NULL))
+                   OR (amount IS NOT NULL AND typeof(amount) NOT IN ('integer', 'real'))
+                ORDER BY id LIMIT 10""")]
+        if bad:
+            raise ValueError(f"{table} rows {bad} have a date or amount that can't be converted; "
+                             "fix them (dates as YYYY-MM-DD, numeric amounts) and migrate again")
+
+
+def _compact_ledger(table, extra_column, extra_name):
+    new = f"{table}_compact"
+    return [
+        f"""CREATE TABLE {new} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER,
+            {extra_column}
+            paise INTEGER,{_DERIVED_COLUMNS}
+        )""",
+        # Carry the AUTOINCREMENT counter over, so ids of deleted rows aren't reused
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT '{new}', seq FROM sqlite_sequence WHERE name = '{table}'",
+        f"""INSERT INTO {new} (id, day, {extra_name} paise)
+            SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), {extra_name} CAST(ROUND(amount * 100) AS INTEGER)
+            FROM {table}""",
+        f"DROP TABLE {table}", # Its indexes and rollup triggers go with it
+        f"ALTER TABLE {new} RENAME TO {table}",
+    ]
+
+
+MIGRATIONS.append(
+    (4, "Compact ledger: integer day numbers and paise, derived date/month/year/amount",
+     [_check_compactable]
+     + [statement for table, columns in _COMPACT_LEDGERS.items() for statement in _compact_ledger(table, *columns)]
+     + [
+        # Month and date summaries read the rollups, so a day index and the
+        # category index are all the ledger itself needs
+        "CREATE INDEX IF NOT EXISTS idx_expenses_day ON expenses (day, paise)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses (category, paise)",
+        "CREATE INDEX IF NOT EXISTS idx_income_day ON income (day, paise)",
+        "DROP TABLE rollup_totals",
+        "DROP TABLE rollup_category",
+        "DROP TABLE rollup_month",
+        "DROP TABLE rollup_date",
+        "CREATE TABLE rollup_totals (kind TEXT PRIMARY KEY, total INTEGER NOT NULL, row_count INTEGER NOT NULL)",
+        """CREATE TABLE rollup_category (category TEXT PRIMARY KEY, total INTEGER NOT NULL,
+            row_count INTEGER NOT NULL)""",
+        """CREATE TABLE rollup_month (kind TEXT NOT NULL, year INTEGER NOT NULL, month INTEGER NOT NULL,
+            total INTEGER NOT NULL, row_count INTEGER NOT NULL, PRIMARY KEY (kind, year, month))""",
+        """CREATE TABLE rollup_date (kind TEXT NOT NULL, day INTEGER NOT NULL, total INTEGER NOT NULL,
+            row_count INTEGER NOT NULL, PRIMARY KEY (kind, day))""",
+        """INSERT INTO rollup_totals (kind, total, row_count)
+            SELECT 'expense', COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+            UNION ALL SELECT 'income', COALESCE(SUM(paise), 0), COUNT(*) FROM income""",
+        """INSERT INTO rollup_category (category, total, row_count)
+            SELECT category, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses WHERE category IS NOT NULL GROUP BY category""",
+        """INSERT INTO rollup_month (kind, year, month, total, row_count)
+            SELECT 'expense', year, month, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+                WHERE day IS NOT NULL GROUP BY year, month
+            UNION ALL SELECT 'income', year, month, COALESCE(SUM(paise), 0), COUNT(*) FROM income
+                WHERE day IS NOT NULL GROUP BY year, month""",
+        """INSERT INTO rollup_date (kind, day, total, row_count)
+            SELECT 'expense', day, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses WHERE day IS NOT NULL GROUP BY day
+            UNION ALL SELECT 'income', day, COALESCE(SUM(paise), 0), COUNT(*) FROM income WHERE day IS NOT NULL GROUP BY day""",
+    ] + _rollup_triggers(_COMPACT_ROLLUPS, amount='paise'))
+)
+
+# Insights and forecasts precomputed in the background (see insights.py): one
+# row per ledger, with the watermark of the ledger state it was computed from.
+MIGRATIONS.append(
+    (5, "Stored insights and forecasts", [
+        """CREATE TABLE IF NOT EXISTS insights (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            as_of INTEGER NOT NULL,
+            watermark TEXT NOT NULL,
+            computed_at TEXT NOT NULL,
+            payload TEXT NOT NULL
+        )""",
+    ])
+)
+
+# Ledger rewrite counter (migration 6): bumped by triggers on every UPDATE or
+# DELETE of a ledger row, so readers holding derived copies (analytics.py's
+# columns, insights.py's watermark) notice changes their row counts and totals
+# can't show, such as a re-dated or re-categorized expense.
+MIGRATIONS.append(
+    (6, "Counter of rewritten and deleted ledger rows", [
+        """CREATE TABLE IF NOT EXISTS ledger_rewrites (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            count INTEGER NOT NULL
+        )""",
+        "INSERT OR IGNORE INTO ledger_rewrites (id, count) VALUES (1, 0)",
+    ] + [f"""CREATE TRIGGER IF NOT EXISTS {ledger}_rewrites_{event.lower()} AFTER {event} ON {ledger} BEGIN
+            UPDATE ledger_rewrites SET count = count + 1 WHERE id = 1;
+        END""" for ledger in ('expenses', 'income') for event in ('UPDATE', 'DELETE')])
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Applies pending migrations up to `target` and returns the resulting version."""
+    version = schema_version(conn)
+    if version > LATEST_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than this code ({LATEST_VERSION})")
+    pending = [m for m in MIGRATIONS if version < m[0] <= target]
+    if not pending:
+        return version
+
+    if conn.in_transaction:
+        conn.commit()
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None # Manage the transaction ourselves so DDL stays inside it
+    try:
+        for number, description, statements in pending:
+            # IMMEDIATE takes the write lock up front, so two processes starting
+            # together can't both apply the same migration
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if schema_version(conn) >= number:
+                    conn.execute("COMMIT") # Someone else applied it meanwhile
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn) # A check or data step that needs Python
+                    else:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {int(number)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"Applied migration {number}: {description}")
+    finally:
+        conn.isolation_level = isolation_level
+    return schema_version(conn)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python migrations.py /path/to/fund_manager.db")
+    with sqlite3.connect(sys.argv[1]) as db:
+        before = schema_version(db)
+        after = migrate(db)
+    print(f"Schema version: {before} -> {after}")
@@ -0,0 +1,187 @@
+"""Incrementally trainable intent classifier for learning from user corrections.
+
+OnlineIntentModel pairs a HashingVectorizer (stateless: no vocabulary to refit,
+unseen words just hash into the fixed feature space) with an SGDClassifier
+trained by partial_fit. A correction is one small partial_fit over that message
+plus a fixed-size sample of earlier examples, so an update costs the same after
+ten corrections as after ten thousand, and the replayed examples keep a burst of
+corrections from drowning out what the model already knew.
+
+backend2.py uses it with FUNDMATE_MODEL_FORMAT=online: `vectorizer` and `model`
+point at this object, which offers the transform()/predict() pair the sklearn
+objects do.
+"""
+import csv
+import os
+import random
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+SNAPSHOT_VERSION = 1
+
+
+class OnlineIntentModel:
+    """Hashed features + SGD logistic regression, updated in place by learn()."""
+
+    def __init__(self, classes, n_features=2 ** 18, replay_size=2000, replay_per_update=32,
+                 correction_weight=4, seed=0):
+        self.classes = np.asarray(sorted(classes))
+        # alternate_sign=False keeps features non-negative like TF-IDF; l2 norm
+        # keeps long messages from dominating updates
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                            alternate_sign=False, norm='l2')
+        self.classifier = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=seed)
+        self.replay_size = replay_size
+        self.replay_per_update = replay_per_update
+        self.correction_weight = correction_weight
+        self.updates = 0
+        self._replay = [] # Reservoir sample of (text, intent) seen so far
+        self._seen = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def transform(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def predict(self, X):
+        with self._lock: # Never read coefficients halfway through an update
+            return self.classifier.predict(X)
+
+    def fit_initial(self, texts, intents, epochs=5):
+        """Trains from scratch on a labelled dataset (a few shuffled passes of partial_fit)."""
+        pairs = list(zip(texts, intents))
+        with self._lock:
+            for _ in range(epochs):
+                self._random.shuffle(pairs)
+                X = self.vectorizer.transform([text for text, _ in pairs])
+                self.classifier.partial_fit(X, [intent for _, intent in pairs], classes=self.classes)
+            for pair in pairs:
+                self._remember(pair)
+
+    def learn(self, text, intent):
+        """Applies one correction: `text` should have been classified as `intent`."""
+        if intent not in self.classes:
+            raise ValueError(f"Unknown intent {intent!r}; expected one of {', '.join(self.classes)}")
+        with self._lock:
+            sample = self._random.sample(self._replay, min(self.replay_per_update, len(self._replay)))
+            batch = [(text, intent)] * self.correction_weight + sample
+            X = self.vectorizer.transform([t for t, _ in batch])
+            self.classifier.partial_fit(X, [i for _, i in batch], classes=self.classes)
+            self._remember((text, intent))
+            self.updates += 1
+
+    def _remember(self, pair):
+        # Reservoir sampling: every example seen has the same chance to be kept
+        self._seen += 1
+        if len(self._replay) < self.replay_size:
+            self._replay.append(pair)
+        else:
+            slot = self._random.randrange(self._seen)
+            if slot < self.replay_size:
+                self._replay[slot] = pair
+
+    def save(self, path):
+        """Writes a snapshot atomically (temp file + rename), so readers never see half a file."""
+        with self._lock:
+            # Copy the state under the lock; the slow part (writing) happens outside it
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "classes": self.classes.copy(),
+                "n_features": self.vectorizer.n_features,
+                "coef": self.classifier.coef_.copy(),
+                "intercept": self.classifier.intercept_.copy(),
+                "params": self.classifier.get_params(),
+                "t": self.classifier.t_,
+                "replay": list(self._replay),
+                "seen": self._seen,
+                "updates": self.updates,
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.online-', suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump(state, tmp)
+            os.chmod(tmp, 0o644) # mkstemp creates it owner-only
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported online snapshot version {state.get('version')} in {path}")
+        model = cls(state["classes"], n_features=state["n_features"])
+        model.classifier.set_params(**state["params"])
+        # A partial_fit on one known example sets up the fitted attributes; then
+        # the saved weights replace whatever it learned
+        X = model.vectorizer.transform([""])
+        model.classifier.partial_fit(X, state["classes"][:1], classes=state["classes"])
+        model.classifier.coef_ = state["coef"]
+        model.classifier.intercept_ = state["intercept"]
+        model.classifier.t_ = state["t"]
+        model._replay = state["replay"]
+        model._seen = state["seen"]
+        model.updates = state["updates"]
+        return model
+
+
+def load_or_train(snapshot_path, dataset_path):
+    """Loads the latest snapshot, or trains a first model from the dataset CSV (text,intent columns)."""
+    if os.path.exists(snapshot_path):
+        return OnlineIntentModel.load(snapshot_path)
+    with open(dataset_path, newline='', encoding='utf-8') as f:
+        rows = [(row['text'], row['intent']) for row in csv.DictReader(f) if row.get('text') and row.get('intent')]
+    model = OnlineIntentModel({intent for _, intent in rows})
+    model.fit_initial([text for text, _ in rows], [intent for _, intent in rows])
+    model.save(snapshot_path)
+    return model
+
+
+class SnapshotPolicy:
+    """Decides when to write a snapshot: once `every` updates are unsaved, or `interval` seconds after the first one.
+
+    due() only sees updates when it is called, so call it after each update
+    and also from a timer (wait_time() says how long it may sleep), else a
+    last few updates wait for the next one to be saved.
+    """
+
+    def __init__(self, every=50, interval=300.0, updates=0):
+        self.every = every
+        self.interval = interval
+        self._last_updates = updates # Count at the last snapshot
+        self._pending_since = None # When due() first saw updates newer than that
+        self._lock = threading.Lock()
+
+    def due(self, updates, force=False):
+        """Returns True (and starts a new period) if a snapshot should be written now.
+
+        With force, any unsaved update makes it due (e.g. at shutdown).
+        """
+        with self._lock:
+            if updates <= self._last_updates:
+                return False
+            now = time.monotonic()
+            if self._pending_since is None:
+                self._pending_since = now
+            if force or updates - self._last_updates >= self.every or now - self._pending_since >= self.interval:
+                self._last_updates = updates
+                self._pending_since = None
+                return True
+            return False
+
+    def wait_time(self, updates):
+        """Seconds until due(updates) turns True by the clock alone; None if nothing is unsaved."""
+        with self._lock:
+            if updates <= self._last_updates:
+                return None
+            if self._pending_since is None:
+                return 0.0
+            return max(0.0, self._pending_since + self.interval - time.monotonic())
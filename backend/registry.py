@@ -0,0 +1,132 @@
+"""Versioned model registry for the chat backend (backend2.py).
+
+Layout under the registry root:
+
+    v1/model.pkl, v1/vectorizer.pkl    pickled sklearn model + vectorizer
+    v1/model.npz                       compact export (FUNDMATE_MODEL_FORMAT=compact/mmap)
+    v2/...
+    CURRENT                            name of the version backend2 should serve
+
+A version is copied into a staging directory and renamed into place, and
+CURRENT is replaced with a rename too, so a reader never sees half a version.
+Published versions are never modified; roll back by activating an older one.
+
+Usage (from the backend folder):
+    python registry.py ROOT list
+    python registry.py ROOT publish --model m.pkl --vectorizer v.pkl [--compact m.npz] [--version v4] [--activate]
+    python registry.py ROOT activate v3
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import namedtuple
+
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+CURRENT_FILE = 'CURRENT'
+ARTIFACTS = ('model.pkl', 'vectorizer.pkl', 'model.npz')
+
+# What backend2 serves: the classifier pair plus the version it came from
+LoadedModel = namedtuple('LoadedModel', 'version vectorizer model')
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, version):
+        if not VERSION_PATTERN.match(version or ''):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        names = [name for name in os.listdir(self.root)
+                 if VERSION_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name))]
+        # v2 before v10
+        return sorted(names, key=lambda name: [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', name)])
+
+    def current(self):
+        """The active version's name, or None if nothing was activated yet."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def next_version(self):
+        numbers = [int(name[1:]) for name in self.versions() if re.fullmatch(r'v\d+', name)]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def publish(self, artifacts, version=None):
+        """Copies artifacts ({'model.pkl': src, ...}) in as a new version; returns its name."""
+        unknown = set(artifacts) - set(ARTIFACTS)
+        if unknown:
+            raise ValueError(f"Unknown artifact names {sorted(unknown)}; expected {ARTIFACTS}")
+        os.makedirs(self.root, exist_ok=True)
+        version = version or self.next_version()
+        target = self.path(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Model version {version} already exists")
+        staging = tempfile.mkdtemp(dir=self.root, prefix='.staging-')
+        try:
+            for name, source in artifacts.items():
+                shutil.copyfile(source, os.path.join(staging, name))
+            os.chmod(staging, 0o755)
+            os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def activate(self, version):
+        """Points CURRENT at an existing version."""
+        if not os.path.isdir(self.path(version)):
+            raise FileNotFoundError(f"No model version {version} in {self.root}")
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix='.current-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(self.root, CURRENT_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned intent model registry.")
+    parser.add_argument('root', help="Registry directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List versions (* marks the active one)")
+    publish = commands.add_parser('publish', help="Add a new version")
+    publish.add_argument('--model', help="Pickled model (model.pkl)")
+    publish.add_argument('--vectorizer', help="Pickled vectorizer (vectorizer.pkl)")
+    publish.add_argument('--compact', help="Compact export (model.npz)")
+    publish.add_argument('--version', help="Version name (default: next vN)")
+    publish.add_argument('--activate', action='store_true', help="Also make it the active version")
+    activate = commands.add_parser('activate', help="Make a version the active one")
+    activate.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        current = registry.current()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    elif args.command == 'publish':
+        artifacts = {name: path for name, path in (('model.pkl', args.model), ('vectorizer.pkl', args.vectorizer),
+                                                   ('model.npz', args.compact)) if path}
+        if not artifacts:
+            parser.error("publish needs at least one of --model/--vectorizer/--compact")
+        version = registry.publish(artifacts, args.version)
+        print(f"Published {version}")
+        if args.activate:
+            registry.activate(version)
+            print(f"Activated {version}")
+    else:
+        registry.activate(args.version)
+        print(f"Activated {args.version}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Streaming ledger reports and exports from fund_manager.db.
+
+A Report selects expenses and/or income rows dated within [start, end] and
+either lists them or totals them per day, week (starting Monday), month, year
+or category. stream_report() reads the rows with fetchmany() in fixed-size
+chunks and yields CSV or NDJSON text chunk by chunk, so memory stays flat
+however many rows match and the first bytes go out before the query finishes.
+
+Rows come off the day-number indexes already in date order (SQLite merges the
+two tables' index scans), so time groupings are totalled on the fly in exact
+integer paise: each period is sent as soon as the next one starts, with no
+sort or temp table.
+
+    python reports.py /path/to/fund_manager.db 2025-01-01 2025-06-30 --group week --format csv > report.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+from datetime import datetime
+
+from ledger import day_number, from_paise
+
+KINDS = ('all', 'expense', 'income')
+GROUPS = (None, 'day', 'week', 'month', 'year', 'category')
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# SQL expression for the period a row's date falls in; each sorts like the date itself
+PERIODS = {
+    'day': "date",
+    'week': "date(date, '-6 days', 'weekday 1')", # The Monday on or before the date
+    'month': "substr(date, 1, 7)",
+    'year': "substr(date, 1, 4)",
+}
+ROW_COLUMNS = ('kind', 'id', 'date', 'category', 'amount')
+PERIOD_COLUMNS = ('period', 'expenses', 'expense_count', 'income', 'income_count', 'net')
+CATEGORY_COLUMNS = ('category', 'expenses', 'expense_count')
+
+
+class Report:
+    """What to report: a date range (inclusive, YYYY-MM-DD), which ledger(s) and an optional grouping."""
+
+    def __init__(self, start, end, kind='all', group=None):
+        self.start = self._parse_date(start, 'start')
+        self.end = self._parse_date(end, 'end')
+        if self.start > self.end:
+            raise ValueError(f"start ({self.start}) is after end ({self.end})")
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}, got {kind!r}")
+        if group not in GROUPS:
+            raise ValueError(f"group must be one of {', '.join(g for g in GROUPS if g)}, got {group!r}")
+        if group == 'category' and kind == 'income':
+            raise ValueError("Income has no categories; group income by a time period instead")
+        self.kind = 'expense' if group == 'category' else kind
+        self.group = group
+
+    @staticmethod
+    def _parse_date(value, name):
+        try:
+            return datetime.strptime(value or '', '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"{name} must be a date like 2025-01-31, got {value!r}") from None
+
+    @property
+    def columns(self):
+        if self.group == 'category':
+            return CATEGORY_COLUMNS
+        return PERIOD_COLUMNS if self.group else ROW_COLUMNS
+
+    def sql(self):
+        """(query, params) producing rows in date order."""
+        if self.group == 'category':
+            # Few groups, so let SQLite total them; category order, not date order
+            return ("SELECT category, COALESCE(SUM(paise), 0) / 100.0, COUNT(*) FROM expenses "
+                    "WHERE day BETWEEN ? AND ? GROUP BY category ORDER BY category", self._days())
+        key = PERIODS.get(self.group, "date")
+        value = "paise" if self.group else "amount" # Totals add up integer paise
+        selects, params = [], []
+        if self.kind in ('all', 'expense'):
+            selects.append(f"SELECT 'expense' AS kind, id, date, category, {value}, {key} AS period, day "
+                           "FROM expenses WHERE day BETWEEN ? AND ?")
+            params += self._days()
+        if self.kind in ('all', 'income'):
+            selects.append(f"SELECT 'income' AS kind, id, date, NULL AS category, {value}, {key} AS period, day "
+                           "FROM income WHERE day BETWEEN ? AND ?")
+            params += self._days()
+        return " UNION ALL ".join(selects) + " ORDER BY day", params
+
+    def _days(self):
+        return [day_number(self.start), day_number(self.end)]
+
+
+def fetch_chunks(conn, report, chunk_size=2000):
+    """Yields lists of up to chunk_size result rows (tuples in report.columns order)."""
+    query, params = report.sql()
+    cursor = conn.execute(query, params)
+    try:
+        if report.group in PERIODS:
+            yield from _total_periods(cursor, chunk_size)
+            return
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            if report.group is None:
+                rows = [row[:5] for row in rows] # Drop the period and day columns
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _total_periods(cursor, chunk_size):
+    """Totals consecutive rows of the same period; yields the finished periods after each fetch."""
+    period, totals = None, None
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        done = []
+        for kind, _, _, _, paise, row_period, _ in rows:
+            if row_period != period:
+                if period is not None:
+                    done.append(_period_row(period, totals))
+                period, totals = row_period, [0, 0, 0, 0]
+            offset = 0 if kind == 'expense' else 2
+            totals[offset] += paise or 0
+            totals[offset + 1] += 1
+        if not rows:
+            if period is not None:
+                yield [_period_row(period, totals)]
+            return
+        if done:
+            yield done
+
+
+def _period_row(period, totals):
+    expenses, expense_count, income, income_count = totals
+    return (period, from_paise(expenses), expense_count, from_paise(income), income_count, from_paise(income - expenses))
+
+
+def stream_report(conn, report, fmt='csv', chunk_size=2000):
+    """Yields the report as text, one chunk of rows at a time (a CSV header first)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}, got {fmt!r}")
+    columns = report.columns
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        for rows in fetch_chunks(conn, report, chunk_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
+    else:
+        for rows in fetch_chunks(conn, report, chunk_size):
+            yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a date range of the ledger as CSV or NDJSON.")
+    parser.add_argument('db', help="Path to fund_manager.db")
+    parser.add_argument('start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('end', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--kind', choices=KINDS, default='all')
+    parser.add_argument('--group', choices=[g for g in GROUPS if g])
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    args = parser.parse_args()
+    try:
+        report = Report(args.start, args.end, args.kind, args.group)
+    except ValueError as e:
+        parser.error(str(e))
+    conn = sqlite3.connect(args.db)
+    try:
+        for chunk in stream_report(conn, report, args.format):
+            sys.stdout.write(chunk)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
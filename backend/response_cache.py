@@ -0,0 +1,136 @@
+"""Cache of read-intent replies for the chat backend (backend2.py).
+
+Balance, month, date and category questions are answered from the ledger's
+rollup tables; as long as nothing was written since, the same question gets
+the same reply. ResponseCache keeps those replies in a bounded LRU and decides
+whether an entry is still current with generation counters instead of asking
+SQLite.
+
+Every entry is filed under tags: one for exactly what it reports (e.g.
+(user, "month", 4, 2025)) and one for the user's whole ledger. A write bumps
+the counters of the tags it affects; an entry whose counters moved since it
+was filled is stale. The counters live in a small memory-mapped file shared by
+every worker process, so a write handled by one gunicorn worker invalidates
+the replies cached by the others. Tags are hashed onto a fixed number of
+counters; two tags sharing one only costs an extra miss.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+COUNTER = struct.Struct('<Q')
+
+
+@lru_cache(maxsize=16384)
+def tag_slot(tag, slots):
+    """The counter a tag maps to; the same in every process (hash() is salted per process)."""
+    digest = hashlib.blake2b(repr(tag).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % slots
+
+
+class ResponseCache:
+    """Thread- and process-safe LRU of replies, invalidated by tag."""
+
+    def __init__(self, path, maxsize=4096, slots=65536):
+        self.path = path
+        self.maxsize = maxsize
+        self.slots = slots
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0 # Lookups that found an entry a write had invalidated
+        self.invalidations = 0
+        self._entries = OrderedDict() # (tags, variant) -> (counters when filled, reply)
+        self._lock = threading.Lock()
+        self._bump_lock = threading.Lock() # lockf only excludes other processes
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            size = slots * COUNTER.size
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size) # New counters read as 0
+            self._fd = fd
+            self._counters = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def _slot(self, tag):
+        return tag_slot(tag, self.slots)
+
+    def _read(self, tags):
+        return tuple(COUNTER.unpack_from(self._counters, self._slot(tag) * COUNTER.size)[0] for tag in tags)
+
+    def lookup(self, tags, variant=None):
+        """Returns (reply, None) on a hit, else (None, token) to pass to store() with the fresh reply.
+
+        The token is read before the caller queries the database, so a write
+        landing in between makes the stored entry stale rather than wrong.
+        """
+        if self.maxsize <= 0:
+            return None, None
+        key = (tags, variant)
+        current = self._read(tags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == current:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], None
+            if entry is not None:
+                del self._entries[key]
+                self.stale += 1
+            self.misses += 1
+        return None, current
+
+    def store(self, tags, token, reply, variant=None):
+        """Caches reply under tags (token from lookup()) and returns it."""
+        if token is None:
+            return reply
+        key = (tags, variant)
+        with self._lock:
+            self._entries[key] = (token, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return reply
+
+    def invalidate(self, tags):
+        """Marks every reply filed under any of tags as stale, in all processes. Call after committing."""
+        slots = sorted({self._slot(tag) for tag in tags})
+        with self._bump_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for slot in slots:
+                    offset = slot * COUNTER.size
+                    value = COUNTER.unpack_from(self._counters, offset)[0]
+                    COUNTER.pack_into(self._counters, offset, (value + 1) & 0xFFFFFFFFFFFFFFFF)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        """Drops this process's entries. The counters keep running."""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        self._counters.close()
+        os.close(self._fd)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
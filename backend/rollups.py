@@ -0,0 +1,70 @@
+"""Consistency checker for the rollup tables maintained by triggers (migrations 3 and 4).
+
+Recomputes every rollup from the raw expenses/income rows and reports entries
+whose stored total or row count drifted. With --repair the rollups are rebuilt
+from the ledger in one transaction.
+
+    python rollups.py /path/to/fund_manager.db [--repair]
+"""
+import sqlite3
+import sys
+
+# rollup table -> (key columns, query computing the rollup rows from the ledger)
+ROLLUP_SOURCES = {
+    'rollup_totals': (('kind',), """
+        SELECT 'expense', COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+        UNION ALL SELECT 'income', COALESCE(SUM(paise), 0), COUNT(*) FROM income"""),
+    'rollup_category': (('category',), """
+        SELECT category, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+        WHERE category IS NOT NULL GROUP BY category"""),
+    'rollup_month': (('kind', 'year', 'month'), """
+        SELECT 'expense', year, month, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+            WHERE day IS NOT NULL GROUP BY year, month
+        UNION ALL SELECT 'income', year, month, COALESCE(SUM(paise), 0), COUNT(*) FROM income
+            WHERE day IS NOT NULL GROUP BY year, month"""),
+    'rollup_date': (('kind', 'day'), """
+        SELECT 'expense', day, COALESCE(SUM(paise), 0), COUNT(*) FROM expenses
+            WHERE day IS NOT NULL GROUP BY day
+        UNION ALL SELECT 'income', day, COALESCE(SUM(paise), 0), COUNT(*) FROM income
+            WHERE day IS NOT NULL GROUP BY day"""),
+}
+
+
+def check_rollups(conn):
+    """Returns a list of (table, key, stored (total, count), actual (total, count)) drift entries."""
+    drift = []
+    for table, (columns, source) in ROLLUP_SOURCES.items():
+        width = len(columns)
+        actual = {row[:width]: row[width:] for row in conn.execute(source)}
+        stored = {row[:width]: row[width:] for row in
+                  conn.execute(f"SELECT {', '.join(columns)}, total, row_count FROM {table}")}
+        for key in actual.keys() | stored.keys():
+            # A key with no ledger rows may be absent from either side
+            have = stored.get(key, (0, 0))
+            want = actual.get(key, (0, 0))
+            if have != want: # Totals are integer paise, so any difference is drift
+                drift.append((table, key, have, want))
+    return drift
+
+
+def rebuild_rollups(conn):
+    """Replaces every rollup with totals recomputed from the ledger."""
+    with conn:
+        for table, (columns, source) in ROLLUP_SOURCES.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"INSERT INTO {table} ({', '.join(columns)}, total, row_count) {source}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] != "--repair"):
+        sys.exit("usage: python rollups.py /path/to/fund_manager.db [--repair]")
+    db = sqlite3.connect(sys.argv[1])
+    problems = check_rollups(db)
+    for table, key, have, want in problems:
+        print(f"{table} {key}: stored total={have[0]} rows={have[1]}, ledger total={want[0]} rows={want[1]}")
+    print(f"{len(problems)} drifted rollup entries")
+    if problems and len(sys.argv) == 3:
+        rebuild_rollups(db)
+        print(f"Rebuilt rollups; {len(check_rollups(db))} drifted entries remain")
+    db.close()
+    sys.exit(1 if problems and len(sys.argv) == 2 else 0)
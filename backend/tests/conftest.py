@@ -0,0 +1,36 @@
+"""Shared fixtures: the Flask app started on an empty ledger in a temp directory.
+
+Run from the repo root:  python -m pytest backend/tests
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@pytest.fixture(scope='session')
+def backend2(tmp_path_factory):
+    data = tmp_path_factory.mktemp('data')
+    # Before the import: start-up connects to and migrates the ledger
+    os.environ.update(FUNDMATE_DB_PATH=str(data / 'ledger.db'),
+                      FUNDMATE_MODEL_REGISTRY_DIR=str(tmp_path_factory.mktemp('registry')),
+                      FUNDMATE_MODEL_WATCH_S='0', FUNDMATE_INSIGHTS_INTERVAL_S='0')
+    import backend2
+    return backend2
+
+
+@pytest.fixture
+def client(backend2):
+    return backend2.app.test_client()
+
+
+@pytest.fixture
+def expenses(backend2):
+    """Returns the (amount, category) rows in the shared ledger's expenses table."""
+    def rows():
+        with sqlite3.connect(backend2.db_path) as conn:
+            return conn.execute("SELECT amount, category FROM expenses ORDER BY id").fetchall()
+    return rows
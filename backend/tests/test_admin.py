@@ -0,0 +1,8 @@
+"""/admin/reload error replies."""
+
+
+def test_missing_version_reply_names_only_the_version(client, backend2):
+    reply = client.post('/admin/reload', json={'version': 'v9'})
+    assert reply.status_code == 404
+    assert reply.get_json()['error'] == "Model version 'v9' not found."
+    assert backend2.MODEL_REGISTRY_DIR not in reply.get_data(as_text=True)
@@ -0,0 +1,23 @@
+"""/chat/batch request validation."""
+import pytest
+
+
+@pytest.mark.parametrize('body, content_type', [
+    ('not json', 'application/json'),
+    ('{"messages": ', 'application/json'),
+    ('["show my balance"]', 'application/json'),
+    ('messages=hi', 'application/x-www-form-urlencoded'),
+])
+def test_malformed_body_is_a_400(client, body, content_type):
+    reply = client.post('/chat/batch', data=body, content_type=content_type)
+    assert reply.status_code == 400
+    assert 'messages' in reply.get_json()['error']
+
+
+def test_non_string_messages_get_their_own_error(client):
+    reply = client.post('/chat/batch', json={'messages': [42, {'text': 'hi'}, '  ', 'hello']})
+    assert reply.status_code == 200
+    results = reply.get_json()['results']
+    assert results[0] == results[1] == {'error': 'Each message must be a string.'}
+    assert results[2] == {'error': 'Received empty message. How can I help?'}
+    assert 'response' in results[3]
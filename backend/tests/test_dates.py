@@ -0,0 +1,21 @@
+"""Date extraction: amounts must not be read as years or days."""
+from datetime import date
+
+import pytest
+
+from dates import extract_date
+
+
+@pytest.mark.parametrize('text', ['spent 200 on pizza', 'add 50 for food', 'spent 12.50 on tea'])
+def test_amount_alone_means_today(text):
+    today = date.today()
+    assert extract_date(text) == (today.isoformat(), today.month, today.year)
+
+
+@pytest.mark.parametrize('text, month, year', [
+    ('add 50 for food in april', 4, date.today().year),
+    ('spent 200 on pizza in april 2025', 4, 2025),
+    ('paid 300 on 15.04.2025', 4, 2025),
+])
+def test_amount_beside_a_date_is_not_the_year(text, month, year):
+    assert extract_date(text)[1:] == (month, year)
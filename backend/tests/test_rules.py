@@ -0,0 +1,42 @@
+"""Rule-based intent overrides: read-only rule words must not swallow expenses."""
+import pytest
+
+from features import MessageFeatures
+
+
+@pytest.mark.parametrize('text', [
+    'add 300 for food at the month end party',
+    'spent 450 on groceries, overspend again',
+])
+def test_expense_with_insights_words_is_recorded(client, expenses, text):
+    before = len(expenses())
+    reply = client.post('/chat', json={'message': text}).get_json()
+    assert 'insights' not in reply['response']
+    assert len(expenses()) == before + 1
+    assert expenses()[-1][0] == MessageFeatures(text).amount
+
+
+@pytest.mark.parametrize('text', [
+    'show my insights',
+    'what is my month-end forecast',
+    'how much will I overspend by 500',
+])
+def test_insights_questions_use_the_rule(backend2, text):
+    assert backend2.rule_based_intent(MessageFeatures(text)) == 'show_insights'
+
+
+def test_expense_with_breakdown_word_is_recorded(client, expenses):
+    before = len(expenses())
+    reply = client.post('/chat', json={'message': 'paid 800 for bike breakdown repair'}).get_json()
+    assert 'No records found' not in reply['response']
+    assert len(expenses()) == before + 1
+    assert expenses()[-1][0] == 800
+
+
+@pytest.mark.parametrize('text', [
+    'spending breakdown for april 2025',
+    'show my spending trends',
+    'breakdown',
+])
+def test_breakdown_questions_use_the_rule(backend2, text):
+    assert backend2.rule_based_intent(MessageFeatures(text)) == 'show_breakdown'
@@ -1,7 +1,20 @@
+import csv
+import hashlib
+import itertools
+import pickle
+import time
+
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
 import joblib
+from joblib import Memory, Parallel, delayed
+import numpy as np
+
+#  Training pipeline: a cross-validated grid search over the vectorizer and
+#  classifier settings, run in parallel, then the winner is refit on all the
+#  data and saved where backend2.py loads it from. Run: python chatbot_code.py
 
 #  Step 1: Load the dataset
 data_path = '/home/kali/AI_Project/chat_botcode/dataset/fundsmanager_augmented_1050_with_heart(1).csv'  # Update if needed
@@ -13,19 +26,172 @@ df.dropna(subset=['text', 'intent'], inplace=True)
 X = df['text']
 y = df['intent']
 
-#  Step 3: Vectorize using TF-IDF
-vectorizer = TfidfVectorizer()
-X_vectorized = vectorizer.fit_transform(X)
+#  Step 2: Search settings
+# Vectorizer settings decide the feature matrices; classifier settings are all
+# fit on the same matrices, so each (vectorizer setting, fold) is tokenized once.
+VECTORIZER_GRID = {
+    'ngram_range': [(1, 1), (1, 2)],
+    'min_df': [1, 2],
+}
+CLASSIFIER_GRID = {
+    'C': [0.3, 1.0, 3.0, 10.0],
+    'class_weight': [None, 'balanced'],
+}
+CV_FOLDS = 5
+N_JOBS = -1  # One task per (vectorizer setting, fold), spread over all cores
+LATENCY_SAMPLES = 200  # Single messages timed per candidate
+# Fitted vectorizers and their fold matrices are cached here, keyed by the
+# dataset's contents, so re-runs (e.g. with a new classifier grid) skip tokenizing
+cache_dir = '/home/kali/AI_Project/chat_botcode/vectorized_set/cv_cache'
+report_path = '/home/kali/AI_Project/chat_botcode/vectorized_set/training_report.csv'
+memory = Memory(cache_dir, verbose=0)
+
+
+def grid(params):
+    return [dict(zip(params, values)) for values in itertools.product(*params.values())]
+
+
+@memory.cache(ignore=['texts', 'train_index', 'test_index'])
+def vectorize_fold(data_hash, n_folds, fold, vectorizer_params, texts, train_index, test_index):
+    """Fits the vectorizer on one fold's training rows; cached on (dataset, fold, settings)."""
+    # float32 halves the matrices (and the cache) at no cost to accuracy
+    vectorizer = TfidfVectorizer(dtype=np.float32, **vectorizer_params)
+    X_train = vectorizer.fit_transform(texts[train_index])
+    X_test = vectorizer.transform(texts[test_index])
+    return vectorizer, X_train, X_test
+
+
+def evaluate_fold(data_hash, fold, vectorizer_params, texts, labels, train_index, test_index, keep_models):
+    """Scores every classifier setting on one fold. Returns [(classifier_params, accuracy, fit_seconds, model)]."""
+    vectorizer, X_train, X_test = vectorize_fold(data_hash, CV_FOLDS, fold, vectorizer_params,
+                                                 texts, train_index, test_index)
+    results = []
+    for classifier_params in grid(CLASSIFIER_GRID):
+        started = time.perf_counter()
+        model = LogisticRegression(max_iter=1000, **classifier_params).fit(X_train, labels[train_index])
+        fit_seconds = time.perf_counter() - started
+        accuracy = float(np.mean(model.predict(X_test) == labels[test_index]))
+        results.append((classifier_params, accuracy, fit_seconds, model if keep_models else None))
+    return vectorizer if keep_models else None, results
+
+
+def measure_latency(vectorizer, model, messages):
+    """Median seconds to classify one message, as the backend does per /chat request."""
+    timings = []
+    for message in messages:
+        started = time.perf_counter()
+        model.predict(vectorizer.transform([message]))
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
 
-#  Step 4: Train Logistic Regression model
-model = LogisticRegression()
+def model_size(vectorizer, model):
+    return len(pickle.dumps((vectorizer, model), protocol=pickle.HIGHEST_PROTOCOL))
+
+
+#  Step 3: Cross-validated search, in parallel
+texts = np.asarray(X, dtype=object)
+labels = np.asarray(y, dtype=object)
+data_hash = hashlib.sha256('\0'.join(f"{t}\t{i}" for t, i in zip(texts, labels)).encode('utf-8')).hexdigest()
+folds = list(StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=0).split(texts, labels))
+vectorizer_candidates = grid(VECTORIZER_GRID)
+classifier_candidates = grid(CLASSIFIER_GRID)
+
+started = time.perf_counter()
+tasks = [(v, fold) for v in range(len(vectorizer_candidates)) for fold in range(CV_FOLDS)]
+# Fold 0's fitted objects are kept to measure size and latency afterwards
+outputs = Parallel(n_jobs=N_JOBS)(
+    delayed(evaluate_fold)(data_hash, fold, vectorizer_candidates[v], texts, labels, *folds[fold], fold == 0)
+    for v, fold in tasks)
+print(f"✅ Cross-validated {len(vectorizer_candidates) * len(classifier_candidates)} candidates x {CV_FOLDS} folds "
+      f"on {len(texts)} messages in {time.perf_counter() - started:.1f}s")
+
+#  Step 4: Report accuracy, size and latency per candidate
+scores = {}  # (vectorizer index, classifier index) -> fold accuracies
+fit_times = {}
+fold0 = {}  # vectorizer index -> (vectorizer, [model per classifier setting])
+for (v, fold), (vectorizer, results) in zip(tasks, outputs):
+    for c, (_, accuracy, fit_seconds, model) in enumerate(results):
+        scores.setdefault((v, c), []).append(accuracy)
+        fit_times.setdefault((v, c), []).append(fit_seconds)
+    if fold == 0:
+        fold0[v] = (vectorizer, [model for _, _, _, model in results])
+
+latency_messages = texts[folds[0][1]][:LATENCY_SAMPLES]
+report = []
+for (v, c), accuracies in scores.items():
+    vectorizer, models = fold0[v]
+    report.append((v, c, {
+        **{k: str(val) for k, val in vectorizer_candidates[v].items()},
+        **{k: str(val) for k, val in classifier_candidates[c].items()},
+        'mean_accuracy': round(float(np.mean(accuracies)), 4),
+        'std_accuracy': round(float(np.std(accuracies)), 4),
+        'vocabulary': len(vectorizer.vocabulary_),
+        'model_bytes': model_size(vectorizer, models[c]),
+        'latency_us': round(measure_latency(vectorizer, models[c], latency_messages) * 1e6, 1),
+        'fit_seconds': round(float(np.mean(fit_times[(v, c)])), 3),
+    }))
+# Best accuracy first; among ties, the smaller and faster model
+report.sort(key=lambda entry: (-entry[2]['mean_accuracy'], entry[2]['model_bytes'], entry[2]['latency_us']))
+rows = [row for _, _, row in report]
+with open(report_path, 'w', newline='', encoding='utf-8') as f:
+    writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+print(f"✅ Report for {len(rows)} candidates written to {report_path}")
+print(pd.DataFrame(rows).head(5).to_string(index=False))
+
+#  Step 5: Refit the best candidate on all the data
+best_v, best_c, best = report[0]
+vectorizer = TfidfVectorizer(**vectorizer_candidates[best_v])
+X_vectorized = vectorizer.fit_transform(X)
+model = LogisticRegression(max_iter=1000, **classifier_candidates[best_c])
 model.fit(X_vectorized, y)
+print(f"✅ Best: {vectorizer_candidates[best_v]} {classifier_candidates[best_c]} "
+      f"(CV accuracy {best['mean_accuracy']:.4f} ± {best['std_accuracy']:.4f})")
 
-#  Step 5: Save the model and vectorizer
+#  Step 6: Save the model and vectorizer
 model_path = '/home/kali/AI_Project/chat_botcode/vectorized_set/intent_model_v3.pkl'
 vectorizer_path = '/home/kali/AI_Project/chat_botcode/vectorized_set/tfidf_vectorizer_v3.pkl'
 
 joblib.dump(model, model_path)
 joblib.dump(vectorizer, vectorizer_path)
 
-print("✅ Model and vectorizer saved successfully.")
\ No newline at end of file
+print("✅ Model and vectorizer saved successfully.")
+
+#  Step 7: Export a compact copy for the backend
+# Vocabulary, IDF weights and LR coefficients as plain arrays, so backend2.py can
+# score messages with NumPy alone (see backend/compact_model.py) instead of
+# importing sklearn and unpickling both objects in every worker.
+COMPACT_FORMAT_VERSION = 1  # Keep in sync with backend/compact_model.py
+compact_model_path = '/home/kali/AI_Project/chat_botcode/vectorized_set/intent_model_v3.npz'
+
+
+def export_compact_model(vectorizer, model, path):
+    params = vectorizer.get_params()
+    unsupported = {k: params[k] for k in ('analyzer', 'tokenizer', 'preprocessor', 'strip_accents')
+                   if params[k] not in (None, 'word')}
+    if unsupported:
+        raise ValueError(f"Compact export only supports the default word analyzer, got {unsupported}")
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    np.savez_compressed(
+        path,
+        format_version=np.int64(COMPACT_FORMAT_VERSION),
+        terms=np.asarray(terms, dtype=str),
+        idf=vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms)),
+        token_pattern=np.asarray(vectorizer.token_pattern),
+        ngram_range=np.asarray(vectorizer.ngram_range, dtype=np.int64),
+        lowercase=np.bool_(vectorizer.lowercase),
+        stop_words=np.asarray(sorted(vectorizer.get_stop_words() or []), dtype=str),
+        norm=np.asarray(vectorizer.norm or ''),
+        use_idf=np.bool_(vectorizer.use_idf),
+        sublinear_tf=np.bool_(vectorizer.sublinear_tf),
+        binary=np.bool_(vectorizer.binary),
+        classes=np.asarray(model.classes_, dtype=str),
+        coef=model.coef_,
+        intercept=model.intercept_,
+    )
+
+
+export_compact_model(vectorizer, model, compact_model_path)
+print(f"✅ Compact model exported to {compact_model_path}")
@@ -1,10 +1,16 @@
 import joblib
+import os
+import sys
 import sqlite3
 import calendar
 import re
 from datetime import datetime
 from dateutil.parser import parse
 
+# The keyword table and matcher are shared with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+from extractors import match_category
+
 # Load model and vectorizer
 # Make sure the paths to your model and vectorizer files are correct
 try:
@@ -32,50 +38,7 @@ def extract_category(text):
     """
     Extracts a spending category from the input text based on keywords.
     """
-    text = text.lower()
-
-    keyword_map = {
-        'food': [
-            'food', 'eat', 'snack', 'lunch', 'dinner', 'breakfast', 'cafe', 'restaurant', 'coffee', 'pizza', 'burger', 'meal', 'thali'
-        ],
-        'stationery': [
-            'stationery', 'pen', 'pencil', 'eraser', 'notebook', 'book', 'copy', 'paper', 'files', 'markers', 'highlighter'
-        ],
-        'outing': [
-            'outing', 'movie', 'cinema', 'trip', 'vacation', 'picnic', 'tour', 'hangout', 'resort', 'travel'
-        ],
-        'transport': [
-            'transport', 'bus', 'train', 'cab', 'taxi', 'auto', 'ride', 'metro', 'flight', 'fare', 'bike', 'uber', 'ola'
-        ],
-        'fees': [
-            'fees', 'tuition', 'school', 'college', 'exam', 'admission', 'registration', 'course', 'classes', 'coaching'
-        ],
-        'heart': [
-            'heart', 'girlfriend', 'boyfriend', 'partner', 'crush', 'date', 'love', 'darling', 'sweetheart', 'bae', 'him', 'her', 'anniversary', 'valentine'
-        ],
-        'clothing': [
-            'clothes', 'clothing', 'dress', 'shirt', 'tshirt', 'jeans', 'hoodie', 'kurta', 'lehenga', 'suit', 'apparel', 'jacket'
-        ],
-        'groceries': [
-            'grocery', 'groceries', 'vegetables', 'fruits', 'milk', 'bread', 'eggs', 'ration', 'supermarket'
-        ],
-        'entertainment': [
-            'entertainment', 'netflix', 'subscription', 'spotify', 'games', 'game', 'movie', 'fun', 'play', 'music', 'youtube'
-        ],
-        'others': [] # Keep 'others' at the end as a fallback
-    }
-
-    for category, keywords in keyword_map.items():
-        # Ensure 'others' is only matched if no other category is found
-        if category == 'others':
-            continue
-
-        for keyword in keywords:
-            # Use regex to match whole words
-            if re.search(r'\b' + re.escape(keyword) + r'\b', text):
-                return category # Return the first category with a whole word match
-
-    return 'others' # Default if no keywords match
+    return match_category(text)[0] # 'others' if no keywords match
 
 
 def extract_amount(text):
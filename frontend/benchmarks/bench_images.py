@@ -0,0 +1,79 @@
+"""Benchmark: what a Streamlit rerun of each frontend page spends on its images.
+
+The images are the ones the apps load, by the same names, relative to the
+working directory (as the apps do). Each page is measured three ways:
+  - inline: read and base64-encode every file on every rerun (the apps before
+    image_cache.py)
+  - data URI: image_cache.py with static serving off; prepared once, then the
+    same data URI goes out on every rerun
+  - static: image_cache.py's default; prepared and written under app/static/
+    once, then each rerun only carries the URL (the browser fetches the file
+    once, "downloaded once" below)
+For each it reports the first run and the bytes and time of every later rerun.
+Pages whose images are missing are skipped. Needs streamlit and Pillow;
+st.cache_resource works outside a running app.
+
+Run from the folder holding the images:  python path/to/frontend/benchmarks/bench_images.py [reruns]
+"""
+import base64
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from streamlit import config
+
+import image_cache
+
+# Keep in sync with the image_src() calls in the apps: (file name, max_width)
+PAGES = {
+    'chat_app_simple.py': [("background.png", 1920), ("girl.png", 160)],
+    'login_app.py': [("FundMate Landscape.png", 360), ("Add_a_subheading.gif", 900)],
+}
+
+
+def inline(path, max_width):
+    with open(path, "rb") as f:
+        return f"data:image;base64,{base64.b64encode(f.read()).decode()}"
+
+
+def rerun(images, src):
+    """(bytes of image references sent, seconds) for one rerun of a page."""
+    started = time.perf_counter()
+    sent = sum(len(src(path, max_width)) for path, max_width in images)
+    return sent, time.perf_counter() - started
+
+
+def main():
+    reruns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{'page':<20} {'mode':<9} {'first run':>10} {'per rerun':>11} {'bytes/rerun':>12} {'downloaded once':>16}")
+    with tempfile.TemporaryDirectory() as static_dir:
+        image_cache.STATIC_DIR = static_dir # Leave frontend/static/ alone
+        for page, images in PAGES.items():
+            missing = [path for path, _ in images if not os.path.exists(path)]
+            if missing:
+                print(f"{page:<20} skipped, missing {', '.join(missing)}")
+                continue
+            for mode, static in (('inline', None), ('data URI', False), ('static', True)):
+                image_cache._data_uri.clear()
+                image_cache._static_file.clear()
+                for name in os.listdir(static_dir):
+                    os.remove(os.path.join(static_dir, name))
+                config.set_option("server.enableStaticServing", bool(static))
+                src = inline if static is None else image_cache.image_src
+                with contextlib.redirect_stdout(io.StringIO()): # image_cache's notes on inlining
+                    _, first = rerun(images, src)
+                timings = [rerun(images, src) for _ in range(reruns)]
+                sent = timings[-1][0]
+                per_rerun = min(seconds for _, seconds in timings)
+                once = sum(os.path.getsize(os.path.join(static_dir, name)) for name in os.listdir(static_dir))
+                print(f"{page:<20} {mode:<9} {first * 1000:>8.1f}ms {per_rerun * 1e6:>9.1f}us "
+                      f"{sent:>12,} {once:>16,}")
+
+
+if __name__ == '__main__':
+    main()
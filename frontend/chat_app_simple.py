@@ -1,23 +1,20 @@
 import streamlit as st
-import base64
+
+from image_cache import image_src
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(page_title="Chat UI", layout="wide")
 
-# ---------- HELPER FUNCTION ----------
-def get_base64_image(img_path):
-    with open(img_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
 # ---------- LOAD IMAGES ----------
-bg_base64 = get_base64_image("background.png")
-girl_base64 = get_base64_image("girl.png")
+# Encoded once per process (see image_cache.py), not on every chat message
+bg_src = image_src("background.png", max_width=1920)
+girl_src = image_src("girl.png", max_width=160)
 
 # ---------- STYLING ----------
 st.markdown(f"""
     <style>
         .stApp {{
-            background-image: url("data:image/png;base64,{bg_base64}");
+            background-image: url("{bg_src}");
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -79,7 +76,7 @@ st.markdown(f"""
             visibility: hidden;
         }}
     </style>
-    <img src="data:image/png;base64,{girl_base64}" class="girl-img">
+    <img src="{girl_src}" class="girl-img">
 """, unsafe_allow_html=True)
 
 # ---------- CHAT STATE ----------
@@ -0,0 +1,120 @@
+"""Images for the Streamlit frontends, prepared once per process.
+
+Streamlit reruns the whole script on every interaction, and an image inlined
+as a data URI is sent to the browser again with each rerun. image_src()
+therefore reads, downsizes and re-encodes each image once per process, behind
+st.cache_resource (the cache key includes the file's modification time, so an
+edited image is picked up), keeping the smaller of the original and a WebP
+re-encode. For background.png that is 2.1MB -> 62KB. Then:
+
+- by default it writes that copy to frontend/static/ and returns its
+  app/static/ URL, which Streamlit serves when server.enableStaticServing is
+  on (frontend/.streamlit/config.toml turns it on for apps started from the
+  frontend folder). A rerun only carries the URL and the browser keeps its
+  copy. File names include a digest of the content, so an edited image gets a
+  new URL.
+- with FUNDMATE_STATIC_URL set, it returns <FUNDMATE_STATIC_URL>/<file name>
+  for the original file instead, for images served by another web server.
+- with static serving off, it falls back to inlining a data URI.
+
+Measure with frontend/benchmarks/bench_images.py.
+"""
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from urllib.parse import quote
+
+import streamlit as st
+from PIL import Image, ImageSequence # Pillow ships with Streamlit
+
+STATIC_URL = os.environ.get("FUNDMATE_STATIC_URL")
+# Streamlit serves the static/ folder next to the app scripts under app/static/
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_PREFIX = "app/static"
+WEBP_QUALITY = 80
+
+MIME_TYPES = {".png": "image/png", ".gif": "image/gif", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+              ".webp": "image/webp"}
+
+
+def image_src(path, max_width=None):
+    """An <img src> / CSS url() value for the image at path.
+
+    max_width is the widest the page shows it, in image pixels (use twice the
+    CSS width for sharp images on high-DPI screens). Raises FileNotFoundError.
+    """
+    if STATIC_URL:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return f"{STATIC_URL.rstrip('/')}/{quote(os.path.basename(path))}"
+    mtime = os.path.getmtime(path)
+    if st.get_option("server.enableStaticServing"):
+        try:
+            return f"{STATIC_PREFIX}/{quote(_static_file(path, mtime, max_width))}"
+        except OSError as e:
+            print(f"Could not write {path} to {STATIC_DIR}, inlining it instead: {e}")
+    return _data_uri(path, mtime, max_width)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _data_uri(path, mtime, max_width):
+    print(f"Inlining {path} into every rerun; start streamlit from the frontend folder "
+          "(or with --server.enableStaticServing true) to serve it as a file")
+    data, extension = _prepare(path, max_width)
+    mime = MIME_TYPES.get(extension, "application/octet-stream")
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _static_file(path, mtime, max_width):
+    """Writes the prepared image to STATIC_DIR (once per content) and returns its file name."""
+    data, extension = _prepare(path, max_width)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+    target = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(target):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        # Written under a temporary name, so a browser (or another process) never reads half a file
+        fd, tmp = tempfile.mkstemp(dir=STATIC_DIR, prefix=".image-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644) # mkstemp creates it owner-only
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return name
+
+
+def _prepare(path, max_width):
+    """(bytes, extension) of the smaller of the original file and its WebP re-encode."""
+    with open(path, "rb") as f:
+        data = f.read()
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        webp = _to_webp(data, max_width)
+    except (OSError, ValueError) as e:
+        print(f"Could not re-encode {path}, using it as is: {e}")
+        webp = None
+    if webp is not None and len(webp) < len(data):
+        return webp, ".webp"
+    return data, extension
+
+
+def _to_webp(data, max_width):
+    """The image (every frame, if animated) as WebP, scaled down to max_width."""
+    image = Image.open(io.BytesIO(data))
+    frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+    if max_width and image.width > max_width:
+        size = (max_width, round(image.height * max_width / image.width))
+        frames = [frame.convert("RGBA").resize(size, Image.LANCZOS) for frame in frames]
+    out = io.BytesIO()
+    if len(frames) > 1:
+        frames[0].save(out, "WEBP", quality=WEBP_QUALITY, save_all=True, append_images=frames[1:],
+                       duration=image.info.get("duration", 100), loop=image.info.get("loop", 0))
+    else:
+        frames[0].save(out, "WEBP", quality=WEBP_QUALITY)
+    return out.getvalue()
@@ -1,9 +1,10 @@
 # login_app.py
 import streamlit as st
-import base64
 import os
 import time
 
+from image_cache import image_src
+
 # --- Page Configuration ---
 st.set_page_config(page_title="FundMate Login", page_icon="🌐")
 
@@ -12,19 +13,18 @@ st.set_page_config(page_title="FundMate Login", page_icon="🌐")
 SECOND_APP_URL = "http://localhost:8502" # Example port for the second app
 
 # --- Helper Functions ---
-def load_logo_base64(path):
+# Images are encoded once per process (see image_cache.py), not on every rerun.
+# max_width is twice the displayed width, for high-DPI screens.
+def load_logo_src(path):
     try:
-        with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+        return image_src(path, max_width=360)
     except FileNotFoundError:
         st.error(f"Logo file not found at: {path}")
         return None
 
-def get_base64_gif(path):
+def get_gif_src(path):
     try:
-        with open(path, "rb") as f:
-            gif_data = f.read()
-        return base64.b64encode(gif_data).decode()
+        return image_src(path, max_width=900)
     except FileNotFoundError:
         st.error(f"GIF file not found at: {path}")
         return None
@@ -33,8 +33,8 @@ def get_base64_gif(path):
 # Assumes logo is in the same folder as script. Adjust path if needed.
 logo_path = "FundMate Landscape.png"
 if os.path.exists(logo_path):
-    logo_b64 = load_logo_base64(logo_path)
-    if logo_b64:
+    logo_src = load_logo_src(logo_path)
+    if logo_src:
         st.markdown(
             f"""
             <style>
@@ -46,7 +46,7 @@ if os.path.exists(logo_path):
                     z-index: 100;
                 }}
             </style>
-            <img src="data:image/png;base64,{logo_b64}" class="top-right-logo">
+            <img src="{logo_src}" class="top-right-logo">
             """,
             unsafe_allow_html=True
         )
@@ -79,12 +79,12 @@ col1, col2 = st.columns([1, 1]) # Adjust ratio if needed
 
 with col1:
     if os.path.exists(gif_path):
-        b64_gif = get_base64_gif(gif_path)
-        if b64_gif:
+        gif_src = get_gif_src(gif_path)
+        if gif_src:
             st.markdown(
                 f"""
                 <div style="text-align: center; max-width: 450px; margin: auto;">
-                    <img src="data:image/gif;base64,{b64_gif}" width="100%"/>
+                    <img src="{gif_src}" width="100%"/>
                 </div>
                 """,
                 unsafe_allow_html=True